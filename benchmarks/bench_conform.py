@@ -0,0 +1,51 @@
+"""Compare the SDK record conformance with the compiled schema of the streams.
+
+Usage: ``poetry run python -m benchmarks.bench_conform``
+"""
+
+import decimal
+import json
+import logging
+import timeit
+
+from singer_sdk.helpers._typing import TypeConformanceLevel, conform_record_data_types
+
+from benchmarks.bench_page_parse import make_orders_page
+from tap_ticketmatic.streams import Orders
+
+ROUNDS = 5
+logger = logging.getLogger("bench")
+
+
+def main() -> None:
+    """Conform a synthetic orders page both ways and print the throughput."""
+    logging.disable(logging.WARNING)
+    records = json.loads(make_orders_page(), parse_float=decimal.Decimal)["data"]
+
+    def conform_sdk() -> list:
+        return [
+            conform_record_data_types(
+                "orders", record, Orders.schema, TypeConformanceLevel.RECURSIVE, logger
+            )
+            for record in records
+        ]
+
+    def conform_compiled() -> list:
+        return [Orders.conform_record(record, []) for record in records]
+
+    assert conform_sdk() == conform_compiled()
+
+    for name, func in (("sdk", conform_sdk), ("compiled", conform_compiled)):
+        seconds = timeit.timeit(func, number=ROUNDS) / ROUNDS
+        print(f"{name}: {len(records) / seconds:,.0f} records/s")
+
+    errors: list = []
+    seconds = timeit.timeit(
+        lambda: [Orders.validate_record(record, errors) for record in records],
+        number=ROUNDS,
+    )
+    print(f"validation: {len(records) * ROUNDS / seconds:,.0f} records/s")
+
+
+if __name__ == "__main__":
+    main()
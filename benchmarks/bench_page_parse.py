@@ -0,0 +1,145 @@
+"""Measure the cost of decoding a synthetic Ticketmatic orders page.
+
+Compares decoding the body twice (paginator and record extraction each calling
+``response.json()``) with the cached ``decode_page`` helper, and the memory of a
+page decoded into dicts with a page decoded into typed records.
+
+Usage: ``poetry run python -m benchmarks.bench_page_parse``
+"""
+
+import decimal
+import json
+import logging
+import timeit
+import tracemalloc
+from typing import Any, Callable
+
+from requests import Response
+from singer_sdk.helpers.jsonpath import extract_jsonpath
+
+from tap_ticketmatic.client import TicketmaticPaginator, TicketmaticStream, decode_page
+from tap_ticketmatic.streams import Orders
+from tap_ticketmatic.structs import msgspec, page_decoder
+
+ROUNDS = 20
+
+ORDERS_DECODER = page_decoder(Orders.schema, "orders") if msgspec else None
+
+
+def make_ticket(orderid: int, ticketid: int) -> dict:
+    """Return a ticket shaped like the ones nested in an order."""
+    return {
+        "orderid": orderid,
+        "id": ticketid,
+        "tickettypeid": 1,
+        "seatzoneid": 2,
+        "price": 25.5,
+        "tickettypepriceid": 3,
+        "servicecharge": 1.25,
+        "ticketholderid": 4,
+        "barcode": f"{ticketid:012d}",
+        "eventid": 5,
+        "pricetypeid": 6,
+        "seatdescription": "Rij 1 stoel 1",
+        "seatcachedvisualx": 10.0,
+        "seatcachedvisualy": 20.0,
+        "tickettypename": "Parterre",
+    }
+
+
+def make_orders_page(size: int = 1000, tickets_per_order: int = 8) -> bytes:
+    """Return the raw body of an orders page with nested tickets and payments."""
+    data = []
+    for orderid in range(size):
+        data.append(
+            {
+                "orderid": orderid,
+                "amountpaid": 204.0,
+                "totalamount": 204.0,
+                "lastupdatets": "2023-01-01 12:00:00",
+                "tickets": [
+                    make_ticket(orderid, orderid * 100 + i)
+                    for i in range(tickets_per_order)
+                ],
+                "payments": [
+                    {
+                        "id": orderid,
+                        "orderid": orderid,
+                        "amount": 204.0,
+                        "paidts": "2023-01-01 12:00:00",
+                        "properties": {"reference": "abc"},
+                    }
+                ],
+                "expiryhandled": 0,
+                "isauthenticatedcustomer": True,
+                "lookup": ["a", "b"],
+            }
+        )
+
+    return json.dumps({"data": data}).encode()
+
+
+def make_response(body: bytes) -> Response:
+    """Wrap a raw body in a requests response."""
+    response = Response()
+    response._content = body
+    response.status_code = 200
+    return response
+
+
+def parse_twice(body: bytes) -> None:
+    """The old behaviour: decode once for records and once for the paginator."""
+    response = make_response(body)
+    page = response.json(parse_float=decimal.Decimal)
+    list(extract_jsonpath(TicketmaticStream.records_jsonpath, input=page))
+    bool(response.json().get("data", []))
+
+
+def parse_once(body: bytes) -> None:
+    """The cached behaviour: the paginator reuses the decoded page."""
+    response = make_response(body)
+    page = decode_page(response)
+    list(extract_jsonpath(TicketmaticStream.records_jsonpath, input=page))
+    TicketmaticPaginator(start_value=0, page_size=1000).has_more(response)
+
+
+def parse_typed(body: bytes) -> None:
+    """Decode the page into typed records, as with `typed_records`."""
+    response = make_response(body)
+    page = decode_page(response, ORDERS_DECODER.decode)
+    list(page.data)
+    TicketmaticPaginator(start_value=0, page_size=1000).has_more(response)
+
+
+def decoded_size(decode: Callable[[bytes], Any], body: bytes) -> int:
+    """Return the bytes allocated for a decoded page."""
+    tracemalloc.start()
+    page = decode(body)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del page
+    return size
+
+
+def main() -> None:
+    """Run the benchmark and print the per-page cost."""
+    logging.disable(logging.INFO)
+    body = make_orders_page()
+    print(f"page size: {len(body) / 1024 / 1024:.1f} MiB")
+    funcs = [("decode twice", parse_twice), ("decode once", parse_once)]
+    if msgspec is not None:
+        funcs.append(("decode typed", parse_typed))
+    for name, func in funcs:
+        seconds = timeit.timeit(lambda: func(body), number=ROUNDS) / ROUNDS
+        print(f"{name}: {seconds * 1000:.1f} ms/page")
+
+    decoders = [("dicts", lambda body: json.loads(body, parse_float=decimal.Decimal))]
+    if msgspec is not None:
+        decoders.append(("typed records", ORDERS_DECODER.decode))
+    for name, decode in decoders:
+        size = decoded_size(decode, body)
+        print(f"memory of {name}: {size / 1024 / 1024:.1f} MiB/page")
+
+
+if __name__ == "__main__":
+    main()
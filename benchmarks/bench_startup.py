@@ -0,0 +1,82 @@
+"""Measure how long the tap takes to start, before it sends its first request.
+
+Every step runs in a fresh interpreter, so imports are not cached between runs.
+Prints the median wall time of importing the SDK and the tap, of discovery, and
+of setting up a sync of a single settings stream from a catalog.
+
+Usage: ``poetry run python -m benchmarks.bench_startup --runs 10``
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CONFIG = {"accountname": "bench", "api_key": "key", "api_secret": "secret"}
+
+STEPS = {
+    "python": "pass",
+    "import singer_sdk": "import singer_sdk.typing",
+    "import tap": "import tap_ticketmatic.tap",
+    "discovery": (
+        "from tap_ticketmatic.tap import Tapticketmatic\n"
+        "Tapticketmatic(config={config}).catalog_dict"
+    ),
+    "sync setup": (
+        "import json\n"
+        "from tap_ticketmatic.tap import Tapticketmatic\n"
+        "catalog = json.load(open({catalog!r}))\n"
+        "tap = Tapticketmatic(config={config}, catalog=catalog)\n"
+        "tap.streams\n"
+        "tap.setup_mapper()"
+    ),
+}
+
+
+def settings_catalog(stream: str) -> dict:
+    """Return the discovered catalog with only `stream` selected."""
+    from tap_ticketmatic.tap import Tapticketmatic
+
+    catalog = Tapticketmatic(config=CONFIG).catalog_dict
+    for entry in catalog["streams"]:
+        for metadata in entry["metadata"]:
+            if not metadata["breadcrumb"]:
+                metadata["metadata"]["selected"] = entry["tap_stream_id"] == stream
+
+    return catalog
+
+
+def run(code: str) -> float:
+    """Return the seconds a fresh interpreter takes to run the code."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run every step in fresh interpreters and print the median times."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--stream", default="price_types")
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json") as catalog:
+        json.dump(settings_catalog(args.stream), catalog)
+        catalog.flush()
+
+        for name, code in STEPS.items():
+            code = code.format(config=CONFIG, catalog=catalog.name)
+            seconds = [run(code) for _ in range(args.runs)]
+            print(f"{name}: {statistics.median(seconds) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Measure full syncs of the tap against the local Ticketmatic stand-in.
+
+The stand-in runs in its own process, so it does not compete with the tap for
+the interpreter. Records are written to /dev/null. Prints the records per
+second, the peak memory of the tap and the time spent in every phase.
+
+Usage: ``poetry run python -m benchmarks.bench_sync --pages 20 --latency 0.05
+--config '{"concurrent_pages": 4}'``
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import resource
+import time
+
+from benchmarks.server import add_arguments, create_server
+from tap_ticketmatic.instrumentation import PHASES
+from tap_ticketmatic.tap import Tapticketmatic
+
+STREAMS = [
+    "orders",
+    "events",
+    "contacts",
+    "price_types",
+    "seat_ranks",
+    "event_locations",
+    "relation_types",
+    "payment_methods",
+    "payment_scenarios",
+]
+
+
+def serve(args: argparse.Namespace, ports: multiprocessing.Queue) -> None:
+    """Run the stand-in on a free port and report the port."""
+    server = create_server(0, args)
+    ports.put(server.server_port)
+    server.serve_forever()
+
+
+def sync(config: dict, streams: list) -> Tapticketmatic:
+    """Run a sync of the selected streams and return the tap."""
+    catalog = Tapticketmatic(config=config).catalog_dict
+    for entry in catalog["streams"]:
+        for metadata in entry["metadata"]:
+            if not metadata["breadcrumb"]:
+                metadata["metadata"]["selected"] = entry["tap_stream_id"] in streams
+
+    tap = Tapticketmatic(config=config, catalog=catalog)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        tap.sync_all()
+
+    return tap
+
+
+def main() -> None:
+    """Sync the streams against the stand-in and print the measurements."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--streams", nargs="+", default=STREAMS)
+    parser.add_argument("--config", default="{}", help="JSON with tap settings")
+    args = parser.parse_args()
+
+    ports: multiprocessing.Queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(args, ports), daemon=True)
+    server.start()
+    while True:
+        try:
+            port = ports.get(timeout=1)
+            break
+        except queue.Empty:
+            if not server.is_alive():
+                raise SystemExit("The stand-in server failed to start.")
+
+    config = {
+        "accountname": "bench",
+        "api_key": "key",
+        "api_secret": "secret",
+        "api_url": f"http://127.0.0.1:{port}/api/1",
+        **json.loads(args.config),
+    }
+
+    logging.disable(logging.WARNING)
+    start = time.perf_counter()
+    try:
+        tap = sync(config, args.streams)
+    finally:
+        server.terminate()
+    seconds = time.perf_counter() - start
+
+    streams = tap.instrumentation.streams
+    emitted = sum(metrics.counters["emitted"] for metrics in streams.values())
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"records: {emitted} in {seconds:.2f} s, {emitted / seconds:.0f} records/s")
+    print(f"peak rss: {peak_rss:.0f} MiB")
+    for phase in PHASES:
+        total = sum(metrics.seconds[phase] for metrics in streams.values())
+        print(f"{phase}: {total:.2f} s")
+    for name, metrics in sorted(streams.items()):
+        print(f"{name}: {metrics.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""Local stand-in for the Ticketmatic API that serves synthetic or recorded records.
+
+The orders, events and contacts endpoints page by `offset` and `limit`, and
+support the `lastupdatesince`, `orderby`, `filter` and `output=ids` parameters
+the tap sends. The settings endpoints return all their records at once,
+filtered by `lastupdatesince`. The queries/export endpoint streams the rows of
+the tables of the export engine as JSON lines, filtered by `lastupdatets`.
+Records are generated from the schemas of the streams, or taken from recorded
+responses.
+
+Usage: ``poetry run python -m benchmarks.server --port 8000 --pages 20``
+"""
+
+import argparse
+import datetime
+import gzip
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from tap_ticketmatic.client import PaginatedTicketmaticStream
+from tap_ticketmatic.schema import schema_types
+from tap_ticketmatic.tap import STREAM_TYPES
+
+START = datetime.datetime(2023, 1, 1)
+
+# A record as (lastupdatets, id, encoded JSON).
+Row = Tuple[str, int, bytes]
+
+# A row of an exported table as (lastupdatets of the record, id of the record, row).
+TableRow = Tuple[str, int, dict]
+
+
+def fake_value(schema: dict, index: int, items: int) -> Any:
+    """Return a value of the type of the schema that varies with the index."""
+    types = schema_types(schema)
+    if "object" in types and "properties" in schema:
+        return {
+            name: fake_value(subschema, index, items)
+            for name, subschema in schema["properties"].items()
+        }
+    if "array" in types:
+        return [
+            fake_value(schema.get("items", {}), index * items + item, items)
+            for item in range(items)
+        ]
+    if "integer" in types:
+        return index
+    if "number" in types:
+        return round(index * 1.25 % 500, 2)
+    if "boolean" in types:
+        return index % 2 == 0
+    if "string" in types:
+        if schema.get("format") == "date-time":
+            return f"{START + datetime.timedelta(minutes=index):%Y-%m-%d %H:%M:%S}"
+        return f"value {index}"
+
+    return None
+
+
+def fake_records(stream: type, count: int, items: int) -> List[dict]:
+    """Return records for the stream, updated in an order unrelated to their id."""
+    # Streams without a replication key inherit the property of the SDK.
+    replication_key = stream.replication_key
+    if not isinstance(replication_key, str):
+        replication_key = None
+
+    records = []
+    for index in range(count):
+        record = fake_value(stream.schema, index, items)
+        record[stream.primary_keys[0]] = index
+        for items_ in record.values():
+            # Nested objects refer to the record they are part of.
+            for item in items_ if isinstance(items_, list) else []:
+                if isinstance(item, dict) and stream.primary_keys[0] in item:
+                    item[stream.primary_keys[0]] = index
+        if replication_key:
+            seconds = index * 7919 % count
+            updated = START + datetime.timedelta(seconds=seconds)
+            record[replication_key] = f"{updated:%Y-%m-%d %H:%M:%S}"
+        records.append(record)
+
+    return records
+
+
+class Endpoint:
+    """The records of one endpoint, encoded once so serving them is cheap."""
+
+    def __init__(self, stream: type, records: List[dict]) -> None:
+        """Encode the records of the stream."""
+        self.paginated = issubclass(stream, PaginatedTicketmaticStream)
+        self.key = key = stream.primary_keys[0]
+        self.rows: List[Row] = [
+            (record.get("lastupdatets") or "", record[key], json.dumps(record).encode())
+            for record in records
+        ]
+        self.sorted_rows = sorted(self.rows, key=lambda row: row[:2])
+        self.rows_by_id = sorted(self.rows, key=lambda row: row[1])
+
+    def select(self, params: Dict[str, str]) -> List[Row]:
+        """Return the rows that match the parameters of a request."""
+        since = params.get("lastupdatesince", "")[:19].replace("T", " ")
+        if not self.paginated:
+            return [row for row in self.rows if row[0] >= since]
+
+        if params.get("orderby") == "id":
+            rows = self.rows_by_id
+        elif params.get("orderby"):
+            rows = self.sorted_rows
+        else:
+            rows = self.rows
+
+        after = re.search(r"where id > (\d+)", params.get("filter", ""))
+        if after:
+            rows = [row for row in rows if row[1] > int(after.group(1))]
+
+        before = re.search(r"lastupdatets < '([^']+)'", params.get("filter", ""))
+        cursor = re.search(
+            r"lastupdatets = '([^']+)' and id > (\d+)", params.get("filter", "")
+        )
+
+        rows = [
+            row
+            for row in rows
+            if row[0] >= since
+            and (not before or row[0] < before.group(1))
+            and not (cursor and row[:2] <= (cursor.group(1), int(cursor.group(2))))
+        ]
+
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        return rows[offset : offset + limit]
+
+
+def export_tables(stream: type, records: List[dict]) -> Dict[str, List[TableRow]]:
+    """Return the rows of the tables that the export engine of the stream queries."""
+    key = stream.primary_keys[0]
+    records = sorted(records, key=lambda record: record[key])
+    tables = {
+        stream.filter_table: [
+            (record.get("lastupdatets") or "", record[key], record)
+            for record in records
+        ]
+    }
+    for name, (table, _, _) in stream.export_nested.items():
+        tables[table] = [
+            (record.get("lastupdatets") or "", record[key], item)
+            for record in records
+            for item in record.get(name) or []
+        ]
+
+    return tables
+
+
+class TicketmaticStandIn(ThreadingHTTPServer):
+    """HTTP server with the endpoints of the streams of the tap."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        pages: int = 10,
+        page_size: int = 1000,
+        settings_records: int = 100,
+        items: int = 4,
+        latency: float = 0.0,
+        recordings: Optional[Path] = None,
+    ) -> None:
+        """Generate or load the records of every endpoint."""
+        super().__init__(address, StandInHandler)
+        self.latency = latency
+        self.endpoints: Dict[str, Endpoint] = {}
+        self.tables: Dict[str, List[TableRow]] = {}
+
+        for stream in STREAM_TYPES:
+            if not getattr(stream, "path", None):
+                continue
+
+            recording = recordings / f"{stream.name}.json" if recordings else None
+            if recording and recording.exists():
+                records = json.loads(recording.read_text())["data"]
+            elif issubclass(stream, PaginatedTicketmaticStream):
+                records = fake_records(stream, pages * page_size, items)
+            else:
+                records = fake_records(stream, settings_records, items)
+
+            self.endpoints[stream.path] = Endpoint(stream, records)
+            if getattr(stream, "export_columns", None):
+                self.tables.update(export_tables(stream, records))
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves a page of records for `/api/1/{accountname}/{path}`."""
+
+    protocol_version = "HTTP/1.1"
+    server: TicketmaticStandIn
+
+    def do_GET(self) -> None:
+        """Return the records of the endpoint that match the parameters."""
+        url = urlparse(self.path)
+        path = "/" + url.path.strip("/").split("/", 3)[-1]
+        endpoint = self.server.endpoints.get(path)
+        if not endpoint:
+            self.send_error(404)
+            return
+
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        rows = endpoint.select(params)
+        if params.get("output") == "ids":
+            rows = [
+                (row[0], row[1], b'{"%s": %d}' % (endpoint.key.encode(), row[1]))
+                for row in rows
+            ]
+        body = b'{"data": [' + b", ".join(row[2] for row in rows) + b"]}"
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=1)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        """Stream the rows of an export query as JSON arrays, one per line."""
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self.path.rstrip("/").endswith("/tools/queries/export"):
+            self.send_error(404)
+            return
+
+        query = json.loads(body)["query"]
+        match = re.match(r"select (.*?) from (\S+) where (.*) order by \w+$", query)
+        table = self.server.tables.get(match.group(2)) if match else None
+        if table is None:
+            self.send_error(400)
+            return
+
+        names = re.findall(r" as (\w+)", match.group(1))
+        since = re.search(r"lastupdatets >= '([^']+)'", match.group(3))
+        before = re.search(r"lastupdatets < '([^']+)'", match.group(3))
+        rows = [
+            row
+            for lastupdatets, _, row in table
+            if (not since or lastupdatets >= since.group(1))
+            and (not before or lastupdatets < before.group(1))
+        ]
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for start in range(0, len(rows), 1000):
+            chunk = b"".join(
+                json.dumps([row.get(name) for name in names]).encode() + b"\n"
+                for row in rows[start : start + 1000]
+            )
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Do not log every request."""
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options of the stand-in to a parser."""
+    parser.add_argument("--pages", type=int, default=10, help="full pages per scan")
+    parser.add_argument(
+        "--page-size", type=int, default=1000, help="records per full page"
+    )
+    parser.add_argument("--settings-records", type=int, default=100)
+    parser.add_argument("--items", type=int, default=4, help="items per array")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument(
+        "--recordings",
+        type=Path,
+        help="folder with recorded responses, named after the streams",
+    )
+
+
+def create_server(port: int, args: argparse.Namespace) -> TicketmaticStandIn:
+    """Create a stand-in with the options of the parsed arguments."""
+    return TicketmaticStandIn(
+        ("127.0.0.1", port),
+        pages=args.pages,
+        page_size=args.page_size,
+        settings_records=args.settings_records,
+        items=args.items,
+        latency=args.latency,
+        recordings=args.recordings,
+    )
+
+
+def main() -> None:
+    """Serve the stand-in until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8000)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = create_server(args.port, args)
+    print(f"Serving on http://127.0.0.1:{server.server_port}/api/1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Batch files for records that are written one at a time."""
+
+import gzip
+import threading
+from contextlib import ExitStack
+from typing import IO, Any, Callable, Optional
+from uuid import uuid4
+
+from singer_sdk.helpers._batch import BatchConfig, JSONLinesEncoding
+
+from tap_ticketmatic.encoding import JSONBackend
+
+
+class JSONLinesBatchWriter:
+    """Write records to JSON Lines batch files as they arrive.
+
+    The batchers of the SDK pull the records of a stream from an iterator. The
+    records of nested streams are pushed while the parent stream is synced, so
+    they are written to a batch file directly instead.
+    """
+
+    def __init__(
+        self,
+        tap_name: str,
+        stream_name: str,
+        config: BatchConfig,
+        dumps: Callable[[Any], bytes] = JSONBackend().dumps,
+    ) -> None:
+        """Prepare the writer, files are created when the first record arrives.
+
+        Raises a ValueError for encodings other than JSON Lines, uncompressed or
+        compressed with gzip.
+        """
+        compression = config.encoding.compression
+        if config.encoding.format != "jsonl" or compression not in (
+            None,
+            "none",
+            "gzip",
+        ):
+            raise ValueError(
+                f"Batch files of nested streams can only be JSON Lines, uncompressed "
+                f"or with gzip, not {config.encoding.format} with {compression} "
+                f"compression."
+            )
+
+        self.encoding = JSONLinesEncoding(compression=compression)
+        self.gzip = compression == "gzip"
+        self.config = config
+        self.dumps = dumps
+        self.sync_id = f"{tap_name}--{stream_name}-{uuid4()}"
+        self.lock = threading.Lock()
+        self.index = 0
+        self.count = 0
+        self._stack = ExitStack()
+        self._file: Optional[IO[bytes]] = None
+        self._url = ""
+
+    def _open(self) -> None:
+        """Open the next batch file."""
+        self.index += 1
+        self.count = 0
+        filename = f"{self.config.storage.prefix or ''}{self.sync_id}-{self.index}"
+        filename += ".json.gz" if self.gzip else ".json"
+
+        fs = self._stack.enter_context(self.config.storage.fs(create=True))
+        self._file = self._stack.enter_context(fs.open(filename, "wb"))
+        if self.gzip:
+            self._file = self._stack.enter_context(
+                gzip.GzipFile(fileobj=self._file, mode="wb")
+            )
+        self._url = fs.geturl(filename)
+
+    def _close(self) -> str:
+        """Close the current batch file and return its URL."""
+        self._stack.close()
+        self._file = None
+        return self._url
+
+    def write(self, record: dict) -> Optional[str]:
+        """Write a record, returning the URL of the batch file once it is full."""
+        with self.lock:
+            if self._file is None:
+                self._open()
+
+            self._file.write(self.dumps(record) + b"\n")
+            self.count += 1
+            if self.count >= self.config.batch_size:
+                return self._close()
+
+        return None
+
+    def close(self) -> Optional[str]:
+        """Close the current batch file, returning its URL if it has records."""
+        with self.lock:
+            return self._close() if self._file is not None else None
@@ -0,0 +1,313 @@
+"""On-disk record cache used to skip unchanged records."""
+
+import decimal
+import hashlib
+import heapq
+import json
+import mmap
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+def normalize_numbers(value: Any) -> Any:
+    """Return the value with equal numbers in the same type.
+
+    The JSON backends decode amounts as floats or as Decimals, with or without
+    trailing zeros. Numbers become ints when they are whole and floats otherwise,
+    so a record hashes the same with every backend.
+    """
+    if isinstance(value, dict):
+        return {key: normalize_numbers(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [normalize_numbers(item) for item in value]
+    if isinstance(value, (float, decimal.Decimal)):
+        number = float(value)
+        return int(number) if number.is_integer() else number
+
+    return value
+
+
+def canonical_json(record: dict) -> bytes:
+    """Return the record as JSON that is the same for records with equal content."""
+    return json.dumps(
+        normalize_numbers(record), sort_keys=True, separators=(",", ":"), default=str
+    ).encode()
+
+
+def record_hash(record: dict) -> str:
+    """Return a stable hash of the content of a record."""
+    return hashlib.sha1(canonical_json(record)).hexdigest()
+
+
+class RecordCache:
+    """Hashes of the records that were last emitted for a stream of an account.
+
+    Entries older than `ttl` seconds are treated as changed, so every record is
+    emitted again at least once per `ttl`. Records that are no longer returned by
+    the API are evicted when the cache is saved after a response with all records.
+    """
+
+    def __init__(self, path: Path, ttl: int) -> None:
+        """Load the cache from `path` if it exists."""
+        self.path = path
+        self.ttl = ttl
+        self.etag: Optional[str] = None
+        self.etag_ts = 0.0
+        self.hashes: Dict[str, List[Any]] = {}
+        self.seen: Dict[str, List[Any]] = {}
+        self.not_modified = False
+
+        if path.exists():
+            data = json.loads(path.read_text())
+            self.etag = data.get("etag")
+            self.etag_ts = data.get("etag_ts", 0.0)
+            self.hashes = data.get("hashes", {})
+
+    @property
+    def valid_etag(self) -> Optional[str]:
+        """Return the ETag of the last response unless it is older than the ttl."""
+        if self.etag and time.time() - self.etag_ts < self.ttl:
+            return self.etag
+
+        return None
+
+    def is_changed(self, key: Any, record: dict) -> bool:
+        """Check whether the record differs from the one that was last emitted."""
+        key = str(key)
+        digest = record_hash(record)
+        previous = self.hashes.get(key)
+        now = time.time()
+
+        if previous and previous[0] == digest and now - previous[1] < self.ttl:
+            self.seen[key] = previous
+            return False
+
+        self.seen[key] = [digest, now]
+        return True
+
+    def update_etag(self, etag: Optional[str]) -> None:
+        """Store the ETag of a response that contained the full set of records."""
+        if etag != self.etag:
+            self.etag = etag
+            self.etag_ts = time.time()
+
+    def save(self, evict: bool = True) -> None:
+        """Write the cache to disk.
+
+        With `evict`, only the records of the last response are kept. Otherwise the
+        response only had the records updated since the bookmark, and their hashes
+        are merged into the cache.
+        """
+        if not self.not_modified and evict:
+            self.hashes = self.seen
+        elif not self.not_modified:
+            self.hashes.update(self.seen)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {"etag": self.etag, "etag_ts": self.etag_ts, "hashes": self.hashes}
+            )
+        )
+        tmp_path.replace(self.path)
+
+
+class FingerprintStore:
+    """Persisted map from the primary key of a record to its fingerprint.
+
+    The map is stored as a sorted array of fixed-size entries that is memory-mapped
+    and searched in place, so large accounts do not need to load it in memory.
+    Fingerprints of new or changed records are merged into the file on save.
+    """
+
+    entry = struct.Struct("<q8s")
+
+    def __init__(self, path: Path) -> None:
+        """Open the fingerprint file at `path` if it exists."""
+        self.path = path
+        self.updates: Dict[int, bytes] = {}
+        self.lock = threading.Lock()
+        self._map: Optional[mmap.mmap] = None
+        self._open()
+
+    def _open(self) -> None:
+        """Memory-map the fingerprint file."""
+        if self.path.exists() and self.path.stat().st_size:
+            with self.path.open("rb") as file:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _entries(self) -> Iterator[Tuple[int, bytes]]:
+        """Iterate over the stored entries in key order."""
+        if self._map is None:
+            return
+
+        for offset in range(0, len(self._map), self.entry.size):
+            yield self.entry.unpack_from(self._map, offset)
+
+    def get(self, key: int) -> Optional[bytes]:
+        """Return the fingerprint of the record that was last emitted for `key`."""
+        if key in self.updates:
+            return self.updates[key]
+
+        if self._map is None:
+            return None
+
+        low, high = 0, len(self._map) // self.entry.size
+        while low < high:
+            middle = (low + high) // 2
+            middle_key, digest = self.entry.unpack_from(
+                self._map, middle * self.entry.size
+            )
+            if middle_key < key:
+                low = middle + 1
+            elif middle_key > key:
+                high = middle
+            else:
+                return digest
+
+        return None
+
+    def is_changed(self, key: int, record: dict) -> bool:
+        """Check whether the record differs from the one that was last emitted."""
+        digest = hashlib.blake2b(canonical_json(record), digest_size=8).digest()
+        with self.lock:
+            if self.get(key) == digest:
+                return False
+
+            self.updates[key] = digest
+            return True
+
+    def save(self) -> None:
+        """Merge the new fingerprints into the file on disk."""
+        with self.lock:
+            if not self.updates:
+                return
+
+            # Updates sort before stored entries with the same key and replace them.
+            entries = heapq.merge(
+                ((key, 0, digest) for key, digest in sorted(self.updates.items())),
+                ((key, 1, digest) for key, digest in self._entries()),
+            )
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with tmp_path.open("wb") as file:
+                previous = None
+                for key, _, digest in entries:
+                    if key != previous:
+                        file.write(self.entry.pack(key, digest))
+                        previous = key
+
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+            tmp_path.replace(self.path)
+            self.updates = {}
+            self._open()
+
+
+class KeyIndex:
+    """Persisted sorted array of the primary keys of the emitted records.
+
+    Keys of emitted records are merged into the file on save. A sweep replaces
+    the file with the keys that the API still lists, and reports the keys that
+    are no longer listed.
+    """
+
+    entry = struct.Struct("<q")
+
+    def __init__(self, path: Path) -> None:
+        """Open the key file at `path` if it exists."""
+        self.path = path
+        self.updates: Set[int] = set()
+        self.lock = threading.Lock()
+        self._map: Optional[mmap.mmap] = None
+        self._open()
+
+    def _open(self) -> None:
+        """Memory-map the key file."""
+        if self.path.exists() and self.path.stat().st_size:
+            with self.path.open("rb") as file:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _close(self) -> None:
+        """Unmap the key file before it is replaced."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _keys(self) -> Iterator[int]:
+        """Iterate over the stored and added keys in order, without duplicates."""
+        size = len(self._map) if self._map is not None else 0
+        stored = (
+            self.entry.unpack_from(self._map, offset)[0]
+            for offset in range(0, size, self.entry.size)
+        )
+        previous = None
+        for key in heapq.merge(stored, sorted(self.updates)):
+            if key != previous:
+                yield key
+                previous = key
+
+    def add(self, key: int) -> None:
+        """Add the key of an emitted record."""
+        with self.lock:
+            self.updates.add(key)
+
+    def save(self) -> None:
+        """Merge the added keys into the file on disk."""
+        with self.lock:
+            if not self.updates:
+                return
+
+            self._write(self._keys())
+            self.updates = set()
+
+    def sweep(self, keys: Iterable[int]) -> Iterator[int]:
+        """Replace the index with `keys`, which ascend, and yield the keys not in it.
+
+        The file is only replaced once all keys were read.
+        """
+        with self.lock:
+            known = self._keys()
+            pending = next(known, None)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            try:
+                with tmp_path.open("wb") as file:
+                    for key in keys:
+                        file.write(self.entry.pack(key))
+                        while pending is not None and pending < key:
+                            yield pending
+                            pending = next(known, None)
+                        if pending == key:
+                            pending = next(known, None)
+
+                while pending is not None:
+                    yield pending
+                    pending = next(known, None)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+
+            self._close()
+            tmp_path.replace(self.path)
+            self.updates = set()
+            self._open()
+
+    def _write(self, keys: Iterable[int]) -> None:
+        """Replace the file on disk with the keys."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with tmp_path.open("wb") as file:
+            for key in keys:
+                file.write(self.entry.pack(key))
+
+        self._close()
+        tmp_path.replace(self.path)
+        self._open()
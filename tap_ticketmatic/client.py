@@ -1,12 +1,228 @@
 """REST client handling, including ticketmaticStream base class."""
 
+import datetime
+import decimal
+import functools
+import io
+import itertools
 import logging
-from typing import Any, Dict, Optional
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
+import backoff
+import requests
 from requests import Response
-from singer_sdk.authenticators import BasicAuthenticator
-from singer_sdk.pagination import BaseOffsetPaginator
+from singer_sdk import metrics
+from singer_sdk.batch import Batcher
+from singer_sdk.exceptions import RetriableAPIError
+from singer_sdk.helpers._compat import datetime_fromisoformat
+from singer_sdk.helpers._typing import TypeConformanceLevel
+from singer_sdk.helpers.jsonpath import extract_jsonpath
+from singer_sdk.pagination import BaseAPIPaginator, BaseOffsetPaginator
 from singer_sdk.streams import RESTStream
+from singer_sdk.streams.core import REPLICATION_INCREMENTAL
+
+from tap_ticketmatic.batch import JSONLinesBatchWriter
+from tap_ticketmatic.cache import FingerprintStore, KeyIndex, RecordCache
+from tap_ticketmatic.instrumentation import StreamMetrics
+from tap_ticketmatic.ratelimit import retry_after_seconds
+from tap_ticketmatic.schema import (
+    CompiledSchema,
+    Conformer,
+    compile_conformer,
+    compile_validator,
+    deselected_paths,
+)
+from tap_ticketmatic.structs import msgspec, page_decoder, to_dict
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def decode_page(
+    response: Response, loads: Optional[Callable[[bytes], Any]] = None
+) -> Any:
+    """Decode the response body once and cache it on the response object.
+
+    Both the paginator and the record extraction need the decoded page, so the
+    parsed body is stored on the response to avoid decoding large pages twice.
+    The body is decoded with `loads`, or by requests when it is not given.
+    """
+    page = getattr(response, "_ticketmatic_page", None)
+    if page is None:
+        if loads is None:
+            page = response.json(parse_float=decimal.Decimal)
+        else:
+            page = loads(response.content)
+        response._ticketmatic_page = page
+
+    return page
+
+
+def stream_page(response: Response, prefix: str) -> Iterator[dict]:
+    """Yield the records of a streamed response while its body is being read.
+
+    Only one record is kept in memory at a time. A body that was already read,
+    like that of a prefetched page, is decoded from memory. The number of records
+    seen is stored on the response so the paginator can tell whether the page was
+    empty.
+    """
+    if ijson is None:
+        raise ImportError(
+            "Streaming records requires ijson, install tap-ticketmatic[streaming]."
+        )
+
+    if response._content_consumed:
+        body = io.BytesIO(response.content)
+    else:
+        response.raw.decode_content = True
+        body = response.raw
+    count = 0
+    try:
+        for record in ijson.items(body, prefix):
+            count += 1
+            yield record
+    finally:
+        response._ticketmatic_record_count = count
+        response.close()
+
+
+def add_months(value: datetime.datetime, months: int) -> datetime.datetime:
+    """Return the first day of the month `months` after the month of `value`."""
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def month_windows(
+    start: datetime.datetime, end: datetime.datetime, months: int
+) -> List[dict]:
+    """Split the range from `start` until `end` in windows of `months` months.
+
+    Windows are aligned to the first day of the month of `start`, so the same
+    windows and their bookmarks are found again on every run.
+    """
+    windows = []
+    window_start = start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while window_start <= end:
+        window_end = add_months(window_start, months)
+        windows.append(
+            {
+                "window_start": window_start.isoformat(),
+                "window_end": window_end.isoformat(),
+            }
+        )
+        window_start = window_end
+
+    return windows
+
+
+def export_query(
+    table: str, columns: Dict[str, str], schema: dict, condition: str, order: str
+) -> str:
+    """Return the SQL that exports the columns of a table as the named properties.
+
+    Timestamps are formatted like the REST endpoints return them.
+    """
+    selected = []
+    for name, column in columns.items():
+        if schema["properties"].get(name, {}).get("format") == "date-time":
+            column = f"to_char({column}, 'YYYY-MM-DD HH24:MI:SS')"
+        selected.append(f"{column} as {name}")
+
+    return (
+        f"select {', '.join(selected)} from {table} where {condition} order by {order}"
+    )
+
+
+def merge_nested(
+    records: Iterable[dict], key: str, nested: Dict[str, Tuple[str, Iterable[dict]]]
+) -> Iterator[dict]:
+    """Add the nested rows to the records that they refer to.
+
+    The records are ordered by `key` and the rows of every nested property by
+    their foreign key, so both are read once, side by side. Rows of records that
+    are not exported are skipped.
+    """
+    groups = {
+        name: itertools.groupby(rows, key=lambda row, column=column: row[column])
+        for name, (column, rows) in nested.items()
+    }
+    current = {name: next(group, None) for name, group in groups.items()}
+    for record in records:
+        for name, group in groups.items():
+            while current[name] is not None and current[name][0] < record[key]:
+                current[name] = next(group, None)
+            record[name] = []
+            if current[name] is not None and current[name][0] == record[key]:
+                record[name] = list(current[name][1])
+                current[name] = next(group, None)
+        yield record
+
+
+def page_record_count(response: Response) -> int:
+    """Return the number of records in a page that was parsed."""
+    count = getattr(response, "_ticketmatic_record_count", None)
+    if count is not None:
+        return count
+
+    return len(decode_page(response).get("data", []))
+
+
+class PageSizer:
+    """Adapts the page size of a stream to the observed latency and payload size.
+
+    The size doubles while full pages are fast and small, and halves when a page
+    is slow, too large or fails, always within the configured bounds.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        minimum: int,
+        maximum: int,
+        target_seconds: float,
+        max_bytes: int,
+    ) -> None:
+        """Start at `size`, limited to the bounds."""
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_seconds = target_seconds
+        self.max_bytes = max_bytes
+        self.size = min(max(size, minimum), maximum)
+
+    def observe(self, seconds: float, size_bytes: int, records: int) -> None:
+        """Adjust the size to the duration, size and record count of a page."""
+        if seconds > self.target_seconds or size_bytes > self.max_bytes:
+            self.shrink()
+        elif (
+            records >= self.size
+            and seconds < self.target_seconds / 2
+            and size_bytes < self.max_bytes / 2
+        ):
+            self.size = min(self.maximum, self.size * 2)
+
+    def shrink(self) -> None:
+        """Halve the size, after a slow, large or failed page."""
+        self.size = max(self.minimum, self.size // 2)
 
 
 class TicketmaticPaginator(BaseOffsetPaginator):
@@ -14,10 +230,26 @@ class TicketmaticPaginator(BaseOffsetPaginator):
 
     def has_more(self, response: Response) -> bool:
         """Checks if the Ticketmatic stream contains additional items."""
-        data = response.json().get("data", [])
-
         # Continue fetching data until data list is empty.
-        return bool(data)
+        return page_record_count(response) > 0
+
+    def get_next(self, response: Response) -> int:
+        """Return the offset after the records of the page.
+
+        The page size may change between pages, so the offset moves by the number
+        of records that were returned rather than by a fixed page size.
+        """
+        return self.current_value + page_record_count(response)
+
+
+class TicketmaticKeysetPaginator(BaseAPIPaginator):
+    """Paginator that follows the `lastupdatets` cursor of the previous page."""
+
+    has_more = TicketmaticPaginator.has_more
+
+    def get_next(self, response: Response) -> Optional[Tuple[str, int]]:
+        """Return the `lastupdatets` and id of the last record of the page."""
+        return response._ticketmatic_cursor
 
 
 class TicketmaticStream(RESTStream):
@@ -26,19 +258,111 @@ class TicketmaticStream(RESTStream):
     records_jsonpath = "$.data[*]"
     limit_per_request = 1000
 
+    # Records are conformed by the compiled schema in post_process instead.
+    TYPE_CONFORMANCE_LEVEL = TypeConformanceLevel.NONE
+
+    # Compiled from the schema of the class of the stream on first use.
+    conform_record = CompiledSchema(compile_conformer)
+    validate_record = CompiledSchema(compile_validator)
+
+    # Whether the SCHEMA message of the stream was written in this run.
+    _schema_written = False
+
+    @cached_property
+    def instrumentation(self) -> StreamMetrics:
+        """Return the counters and timings of the stream."""
+        return self._tap.instrumentation.stream(self.name)
+
+    @property
+    def required_properties(self) -> Set[str]:
+        """Properties that are kept in the records, even when they are deselected."""
+        return {*self.primary_keys, self.replication_key} - {None}
+
+    @cached_property
+    def deselected_properties(self) -> FrozenSet[str]:
+        """Dotted paths of the properties that are deselected in the catalog.
+
+        Required properties are kept whole, with all their nested properties, so
+        the streams of nested records get every property that their own catalog
+        selects.
+        """
+        return frozenset(
+            path
+            for path in deselected_paths(self.mask)
+            if path.split(".")[0] not in self.required_properties
+        )
+
+    @cached_property
+    def conform_selected(self) -> Conformer:
+        """Return the conformer of the schema without the deselected properties.
+
+        Deselected subtrees are dropped when the record is conformed, before it is
+        validated, fingerprinted or copied.
+        """
+        if not self.deselected_properties:
+            return self.conform_record
+
+        return compile_conformer(self.schema, deselected=self.deselected_properties)
+
+    @cached_property
+    def unmapped_properties(self) -> set:
+        """Properties that were found in records but not in the schema."""
+        return set()
+
+    @property
+    def validation_sample_rate(self) -> float:
+        """Fraction of the records that is validated against the schema."""
+        return self.config.get("validation_sample_rate", 0)
+
     @property
     def url_base(self) -> str:
         """Return the API URL root, configurable via tap settings."""
-        return "https://apps.ticketmatic.com/api/1/{accountname}"
+        api_url = self.config.get("api_url", "https://apps.ticketmatic.com/api/1")
+        return f"{api_url.rstrip('/')}/{{accountname}}"
 
     @property
-    def authenticator(self) -> BasicAuthenticator:
-        """Return a new authenticator object."""
-        return BasicAuthenticator.create_for_stream(
-            self,
-            username=self.config["api_key"],
-            password=self.config["api_secret"],
-        )
+    def requests_session(self) -> requests.Session:
+        """Return the session of the tap, which is shared by all streams."""
+        return self._tap.requests_session
+
+    def __init__(self, tap: Any, *args: Any, **kwargs: Any) -> None:
+        """Add the account name to the records when several accounts are synced."""
+        if tap.config.get("accounts"):
+            self.schema = {
+                **self.schema,
+                "properties": {
+                    **self.schema["properties"],
+                    "accountname": {"type": ["string", "null"]},
+                },
+            }
+            self.primary_keys = [*self.primary_keys, "accountname"]
+
+        super().__init__(tap, *args, **kwargs)
+
+    @property
+    def partitions(self) -> Optional[List[dict]]:
+        """Partition the stream by account when several accounts are synced."""
+        if not self.config.get("accounts"):
+            return None
+
+        return [
+            {"accountname": account["accountname"]}
+            for account in self.config["accounts"]
+        ]
+
+    def get_account(self, context: Optional[dict]) -> dict:
+        """Return the account that the context belongs to, with its credentials."""
+        accountname = (context or {}).get("accountname", self.config.get("accountname"))
+        return self._tap.accounts[accountname]
+
+    def prepare_request(
+        self, context: Optional[dict], next_page_token: Optional[Any]
+    ) -> requests.PreparedRequest:
+        """Prepare the request, authenticated with the credentials of its account."""
+        prepared_request = super().prepare_request(context, next_page_token)
+        account = self.get_account(context)
+        prepared_request.prepare_auth((account["api_key"], account["api_secret"]))
+        return prepared_request
 
     def get_url_params(
         self,
@@ -52,8 +376,828 @@ class TicketmaticStream(RESTStream):
 
         return params
 
+    def _request(
+        self,
+        prepared_request: requests.PreparedRequest,
+        context: Optional[dict],
+        stream: bool = False,
+    ) -> Response:
+        """Send the request once the rate limiter of its account allows it.
+
+        With `stream` only the headers are read, and the body is read by the caller.
+        """
+        rate_limiter = self._tap.rate_limiters[self.get_account(context)["accountname"]]
+        start = time.perf_counter()
+        rate_limiter.acquire(self.name)
+        self.instrumentation.add("throttle", time.perf_counter() - start)
+
+        start = time.perf_counter()
+        try:
+            if stream:
+                response = self.requests_session.send(
+                    prepared_request, stream=True, timeout=self.timeout
+                )
+                self.validate_response(response)
+            else:
+                response = super()._request(prepared_request, context)
+        except RetriableAPIError as exception:
+            # The wait generator pauses the account when the request was throttled.
+            exception.rate_limiter = rate_limiter
+            raise
+        finally:
+            self.instrumentation.add("request", time.perf_counter() - start, requests=1)
+
+        self.instrumentation.count(bytes=self.response_size(response))
+        return response
+
+    def response_size(self, response: Response) -> int:
+        """Return the size of the response body, without reading a streamed body."""
+        size_bytes = int(response.headers.get("Content-Length") or 0)
+        if not size_bytes and response._content_consumed:
+            size_bytes = len(response.content)
+
+        return size_bytes
+
+    def backoff_handler(self, details: Any) -> None:
+        """Log the retry and count it with the time it waits."""
+        super().backoff_handler(details)
+        response = getattr(details.get("exception"), "response", None)
+        throttled = response is not None and response.status_code == 429
+        self.instrumentation.add(
+            "backoff", details.get("wait") or 0, retries=1, throttled=int(throttled)
+        )
+
+    def backoff_wait_generator(self) -> Generator[float, Any, None]:
+        """Wait as long as the API asks in `Retry-After`, exponentially otherwise.
+
+        Throttled requests pause the rate limiter of their account, so the other
+        streams do not send requests that would be throttled as well.
+        """
+        exponential = backoff.expo(factor=2)
+        next(exponential)
+
+        exception = yield
+        while True:
+            response = getattr(exception, "response", None)
+            wait = retry_after_seconds(response)
+            if wait is None:
+                wait = next(exponential)
+            if response is not None and response.status_code == 429:
+                exception.rate_limiter.pause(wait)
+
+            exception = yield wait
+
+    def _increment_stream_state(
+        self, latest_record: Dict[str, Any], *, context: Optional[dict] = None
+    ) -> None:
+        """Update the bookmark while no other stream is writing the shared state."""
+        with self._tap.lock:
+            super()._increment_stream_state(latest_record, context=context)
+
+    def _write_state_message(self) -> None:
+        """Copy and write the state while no other stream is changing it."""
+        with self._tap.lock:
+            super()._write_state_message()
+
+    def _finalize_state(self, state: Optional[dict] = None) -> None:
+        """Finalize a bookmark while no other stream is writing the state."""
+        with self._tap.lock:
+            super()._finalize_state(state)
+
+    def _write_replication_key_signpost(
+        self, context: Optional[dict], value: Any
+    ) -> None:
+        """Store the signpost while no other stream is writing the state."""
+        with self._tap.lock:
+            super()._write_replication_key_signpost(context, value)
+
+    def get_context_state(self, context: Optional[dict]) -> dict:
+        """Return the state of the partition, created by one thread at a time.
+
+        Partitions of a stream are synced by separate threads, and the SDK adds the
+        list of partitions to the state on first use.
+        """
+        with self._tap.lock:
+            return super().get_context_state(context)
+
+    def _write_schema_message(self) -> None:
+        """Write the SCHEMA message once, however many partitions are synced."""
+        with self._tap.lock:
+            if not self._schema_written:
+                super()._write_schema_message()
+                self._schema_written = True
+
+    def _write_starting_replication_value(self, context: Optional[dict]) -> None:
+        """Store the starting value while no other stream is writing the state."""
+        with self._tap.lock:
+            super()._write_starting_replication_value(context)
+
+    def finalize_state_progress_markers(self, state: Optional[dict] = None) -> None:
+        """Finalize the bookmark while no other stream is writing the state."""
+        with self._tap.lock:
+            super().finalize_state_progress_markers(state)
+
+    def post_process(self, row: dict, context: Optional[dict] = None) -> Optional[dict]:
+        """Conform the record to the schema and validate a sample of the records."""
+        start = time.perf_counter()
+        unmapped: List[str] = []
+        if isinstance(row, dict):
+            row = self.conform_selected(row, unmapped)
+        else:
+            # Typed records were conformed to the schema when they were decoded.
+            row = to_dict(row)
+        if context and "accountname" in context:
+            row["accountname"] = context["accountname"]
+
+        if not self.unmapped_properties.issuperset(unmapped):
+            self.unmapped_properties.update(unmapped)
+            self.logger.warning(
+                "Properties %s were present in the '%s' stream but not found in "
+                "catalog schema. Ignoring.",
+                tuple(unmapped),
+                self.name,
+            )
+
+        if (
+            self.validation_sample_rate
+            and random.random() < self.validation_sample_rate
+        ):
+            errors: List[str] = []
+            self.validate_record(row, errors)
+            if errors:
+                self.logger.warning(
+                    "Record %s of the '%s' stream does not match the schema: %s",
+                    row.get(self.primary_keys[0]),
+                    self.name,
+                    errors,
+                )
+
+        self.instrumentation.add("validate", time.perf_counter() - start)
+        return row
+
+    def _write_record_message(self, record: dict) -> None:
+        """Write the record and count the time it took."""
+        start = time.perf_counter()
+        super()._write_record_message(record)
+        self.instrumentation.add("emit", time.perf_counter() - start, emitted=1)
+
+    def parse_response(self, response: Response) -> Iterable[dict]:
+        """Parse the response and return an iterator of result records."""
+        page = decode_page(response, self._tap.json_backend.loads)
+        yield from extract_jsonpath(self.records_jsonpath, input=page)
+
 
 class PaginatedTicketmaticStream(TicketmaticStream):
+    """Ticketmatic stream that pages through an endpoint by offset."""
+
+    # ijson prefix that matches the records_jsonpath of the stream.
+    records_prefix = "data.item"
+
+    # Ids per page of the sweep for deleted records, which only lists the ids.
+    ids_per_request = 5000
+
+    # Table of the public datamodel that holds the records, used to filter windows.
+    filter_table: Optional[str] = None
+
+    # Columns of `filter_table` by property, for the queries/export engine.
+    export_columns: Dict[str, str] = {}
+
+    # Nested arrays that are exported from their own table, by property, with the
+    # column that refers to the record, also exported as that property, and the
+    # columns by property.
+    export_nested: Dict[str, Tuple[str, str, Dict[str, str]]] = {}
+
+    def __init__(self, tap: Any, *args: Any, **kwargs: Any) -> None:
+        """Add the property of the deletion markers when deleted records are tracked."""
+        if tap.config.get("track_deleted_records"):
+            self.schema = {
+                **self.schema,
+                "properties": {
+                    **self.schema["properties"],
+                    "_sdc_deleted_at": {
+                        "type": ["string", "null"],
+                        "format": "date-time",
+                    },
+                },
+            }
+
+        super().__init__(tap, *args, **kwargs)
+
+    @property
+    def window_months(self) -> int:
+        """Number of months in each time window, 0 when windows are disabled."""
+        return self.config.get("window_months", 0)
+
+    @property
+    def partitions(self) -> Optional[List[dict]]:
+        """Split the sync of every account in time windows of `window_months` months.
+
+        Every window has its own bookmark in the state, so an interrupted backfill
+        resumes at the window it was in instead of scanning the whole range again.
+        Windows that end before the bookmark of a sync without windows are skipped.
+        """
+        if not self.window_months or not self.filter_table:
+            return super().partitions
+
+        # The SDK parses the `Z` suffix that Python before 3.11 does not.
+        start = datetime_fromisoformat(self.config["start_date"])
+        if not start.tzinfo:
+            start = start.replace(tzinfo=datetime.timezone.utc)
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        windows = month_windows(start, now, self.window_months)
+        partitions = []
+        for account in super().partitions or [{}]:
+            bookmark = self.get_unwindowed_bookmark(account)
+            partitions.extend(
+                {**account, **window}
+                for window in windows
+                if not bookmark
+                or datetime.datetime.fromisoformat(window["window_end"]) > bookmark
+            )
+        return partitions
+
+    def get_unwindowed_bookmark(self, account: dict) -> Optional[datetime.datetime]:
+        """Return the bookmark of the stream or account from a sync without windows.
+
+        Windows are ranges of `lastupdatets`, and records that are updated later
+        move to the last window, so no window gets records before that bookmark.
+        """
+        state = self.stream_state
+        if account:
+            state = next(
+                (
+                    partition
+                    for partition in state.get("partitions", [])
+                    if partition.get("context") == account
+                ),
+                {},
+            )
+        if state.get("replication_key") != self.replication_key or not state.get(
+            "replication_key_value"
+        ):
+            return None
+
+        bookmark = datetime_fromisoformat(str(state["replication_key_value"]))
+        if not bookmark.tzinfo:
+            bookmark = bookmark.replace(tzinfo=datetime.timezone.utc)
+        return bookmark
+
+    @property
+    def keyset_pagination(self) -> bool:
+        """Whether pages are fetched by `lastupdatets` cursor instead of by offset."""
+        return self.config.get("keyset_pagination", False)
+
+    def get_range_params(
+        self, context: Optional[dict], next_page_token: Optional[Any]
+    ) -> Dict[str, Any]:
+        """Return the parameters that limit a request to its time window and cursor.
+
+        With keyset pagination the offset stays 0, pages are ordered by
+        `lastupdatets` and then id, and each page starts after the `lastupdatets`
+        and id of the last record of the previous page. Records with the same
+        timestamp are continued by id, so ties are neither lost nor repeated, and
+        the cursor has the same size however many records share a timestamp.
+        """
+        params: Dict[str, Any] = {}
+        conditions = []
+
+        if context and "window_end" in context:
+            starts = [
+                self.get_starting_timestamp(context),
+                datetime.datetime.fromisoformat(context["window_start"]),
+            ]
+            account = {
+                key: value for key, value in context.items() if key == "accountname"
+            }
+            bookmark = self.get_unwindowed_bookmark(account)
+            if bookmark:
+                starts.append(bookmark)
+            params["lastupdatesince"] = max(starts)
+            end = datetime.datetime.fromisoformat(context["window_end"])
+            conditions.append(f"lastupdatets < '{end:%Y-%m-%d %H:%M:%S}'")
+
+        if self.keyset_pagination:
+            params["offset"] = 0
+            params["orderby"] = "lastupdatets,id"
+            if next_page_token:
+                lastupdatets, last_id = next_page_token
+                params["lastupdatesince"] = lastupdatets
+                conditions.append(
+                    f"(lastupdatets > '{lastupdatets}' "
+                    f"or (lastupdatets = '{lastupdatets}' and id > {last_id}))"
+                )
+
+        if conditions:
+            params["filter"] = (
+                f"select id from {self.filter_table} where {' and '.join(conditions)}"
+            )
+
+        return params
+
+    def _process_record(
+        self,
+        record: dict,
+        child_context: Optional[dict] = None,
+        partition_context: Optional[dict] = None,
+    ) -> None:
+        """Process the record without the window keys of the partition context.
+
+        The SDK adds the keys of the partition to the record, both before it is
+        written and before it is batched.
+        """
+        if partition_context:
+            partition_context = {
+                key: value
+                for key, value in partition_context.items()
+                if key not in ("window_start", "window_end")
+            }
+        super()._process_record(record, child_context, partition_context)
+
+    @property
+    def stream_records(self) -> bool:
+        """Whether records are parsed from the response body while it is read."""
+        return self.config.get("stream_records", False)
+
+    @property
+    def concurrent_pages(self) -> int:
+        """Number of pages that are fetched ahead of the page being processed."""
+        return self.config.get("concurrent_pages", 1)
+
+    @property
+    def checkpoint_pages(self) -> int:
+        """Number of pages between checkpoints in the state, 0 when disabled."""
+        # Records in batch files are only emitted once the file is complete.
+        if self.get_batch_config(self.config):
+            return 0
+
+        return self.config.get("checkpoint_pages", 0)
+
+    def get_checkpoint(self, context: Optional[dict]) -> Optional[dict]:
+        """Return the checkpoint of an interrupted scan that can be resumed.
+
+        Offsets and cursors are only valid for the `lastupdatesince` they were
+        taken with, so checkpoints of a scan from another bookmark are dropped.
+        """
+        state = self.get_context_state(context)
+        checkpoint = state.get("checkpoint")
+        if not checkpoint or not self.checkpoint_pages:
+            return None
+
+        if checkpoint.get("since") != str(self.get_starting_timestamp(context)):
+            self.logger.info("Ignoring checkpoint of a scan from another bookmark.")
+            with self._tap.lock:
+                state.pop("checkpoint", None)
+            return None
+
+        return checkpoint
+
+    def write_checkpoint(
+        self, context: Optional[dict], value: Any, last_record: dict
+    ) -> None:
+        """Store where the scan continues and write it in a STATE message."""
+        fingerprints = self.get_fingerprints(context)
+        if fingerprints:
+            fingerprints.save()
+
+        state = self.get_context_state(context)
+        with self._tap.lock:
+            progress = state.get("progress_markers", {})
+            state["checkpoint"] = {
+                "since": str(self.get_starting_timestamp(context)),
+                "cursor" if self.keyset_pagination else "offset": value,
+                "page_size": self.get_page_size(context),
+                "last_key": last_record.get(self.primary_keys[0]),
+                "replication_key_value": progress.get("replication_key_value"),
+            }
+            self._is_state_flushed = False
+            self._write_state_message()
+
+    def parse_page(
+        self, response: Response, context: Optional[dict]
+    ) -> Generator[dict, None, Optional[dict]]:
+        """Yield the records of a page and return the last one.
+
+        The duration, size and record count of the page are reported to the page
+        sizer of the partition, once the page has been read.
+        """
+        last_record = None
+        count = 0
+        for record in self.instrumentation.timed(
+            self.parse_response(response), "parse"
+        ):
+            last_record = record
+            count += 1
+            yield record
+
+        page_sizer = self.get_page_sizer(context)
+        if page_sizer:
+            page_sizer.observe(
+                response.elapsed.total_seconds(), self.response_size(response), count
+            )
+
+        return last_record
+
+    def request_records(self, context: Optional[dict]) -> Iterable[dict]:
+        """Request records page by page, resuming at the checkpoint of the state.
+
+        Every `checkpoint_pages` pages the offset or cursor of the next page is
+        stored in the state, once the records before it have been written, so an
+        interrupted scan continues there instead of fetching the emitted pages
+        again. The checkpoint is removed when the scan completes.
+        """
+        if self.export_engine:
+            yield from self.export_records(context)
+            return
+
+        checkpoint = self.get_checkpoint(context)
+        if checkpoint:
+            self.logger.info(
+                "Resuming the '%s' stream after record %s.",
+                self.name,
+                checkpoint["last_key"],
+            )
+            page_sizer = self.get_page_sizer(context)
+            if page_sizer:
+                page_sizer.size = checkpoint["page_size"]
+            if checkpoint.get("replication_key_value"):
+                # Keep the bookmark progress of the records emitted before.
+                self._increment_stream_state(
+                    {self.replication_key: checkpoint["replication_key_value"]},
+                    context=context,
+                )
+
+        # Keyset pages depend on the previous page and adaptive page sizes on the
+        # previous pages, so their offsets are not known in advance.
+        if (
+            self.concurrent_pages <= 1
+            or self.keyset_pagination
+            or self.get_page_sizer(context)
+        ):
+            yield from self.request_pages(context, checkpoint)
+        else:
+            yield from self.prefetch_pages(context, checkpoint)
+
+        if self.checkpoint_pages:
+            with self._tap.lock:
+                self.get_context_state(context).pop("checkpoint", None)
+
+    @cached_property
+    def export_unsupported(self) -> List[str]:
+        """Selected properties and child streams that an export cannot fill.
+
+        A nested property is needed when the catalog of the stream selects it, or
+        the catalog of a selected child stream that gets its records.
+        """
+        deselected = deselected_paths(self.mask)
+        exported = {*self.export_columns, *self.export_nested, "accountname"}
+        exported.add("_sdc_deleted_at")
+        missing = [
+            name
+            for name in self.schema["properties"]
+            if name not in self.deselected_properties and name not in exported
+        ]
+        for name, (_, _, columns) in self.export_nested.items():
+            children = [
+                deselected_paths(child.mask)
+                for child in self.child_streams
+                if child.selected and getattr(child, "parent_property", None) == name
+            ]
+            missing.extend(
+                f"{name}.{nested_name}"
+                for nested_name in self.schema["properties"][name]["items"][
+                    "properties"
+                ]
+                if nested_name not in columns
+                and (
+                    f"{name}.{nested_name}" not in deselected
+                    and name not in deselected
+                    or any(nested_name not in child for child in children)
+                )
+            )
+        missing.extend(
+            child.name
+            for child in self.child_streams
+            if child.selected
+            and getattr(child, "parent_property", None) not in self.export_nested
+        )
+
+        return missing
+
+    @cached_property
+    def export_engine(self) -> bool:
+        """Whether the records are extracted through the queries/export endpoint.
+
+        Streams whose selection includes properties or child streams that the
+        export cannot fill are synced page by page instead, so targets do not
+        get empty values for properties that a previous sync filled.
+        """
+        if not self.export_columns or self.name not in self.config.get(
+            "export_streams", []
+        ):
+            return False
+
+        if self.export_unsupported:
+            self.logger.warning(
+                "Syncing the '%s' stream page by page, because the export cannot "
+                "fill %s. Deselect them in the catalog to export the stream.",
+                self.name,
+                ", ".join(self.export_unsupported),
+            )
+            return False
+
+        return True
+
+    def get_export_condition(self, context: Optional[dict]) -> str:
+        """Return the SQL condition that limits an export to the bookmark and window."""
+        start = self.get_starting_timestamp(context)
+        conditions = []
+        if context and "window_end" in context:
+            window_start = datetime.datetime.fromisoformat(context["window_start"])
+            start = max(start, window_start) if start else window_start
+            end = datetime.datetime.fromisoformat(context["window_end"])
+            conditions.append(f"lastupdatets < '{end:%Y-%m-%d %H:%M:%S}'")
+        if start:
+            conditions.insert(0, f"lastupdatets >= '{start:%Y-%m-%d %H:%M:%S}'")
+
+        return " and ".join(conditions) or "true"
+
+    def export_rows(
+        self, context: Optional[dict], query: str, names: List[str]
+    ) -> Iterator[dict]:
+        """Yield the rows of an export query while the response is being read.
+
+        Every line of the response is a row, as an object or as an array of the
+        values of the properties in `names`.
+        """
+        url = self.url_base.replace(
+            "{accountname}", self.get_account(context)["accountname"]
+        )
+        prepared_request = self.prepare_request(context, next_page_token=None)
+        prepared_request.prepare_method("POST")
+        prepared_request.prepare_url(f"{url}/tools/queries/export", {})
+        prepared_request.prepare_body(data=None, files=None, json={"query": query})
+
+        decorated_request = self.request_decorator(
+            functools.partial(self._request, stream=True)
+        )
+        response = decorated_request(prepared_request, context)
+        loads = self._tap.json_backend.loads
+        size_bytes = 0
+        try:
+            for line in response.iter_lines(chunk_size=64 * 1024):
+                if not line:
+                    continue
+                size_bytes += len(line) + 1
+                row = loads(line)
+                yield dict(zip(names, row)) if isinstance(row, list) else row
+        finally:
+            response.close()
+            self.instrumentation.count(bytes=size_bytes)
+
+    def export_records(self, context: Optional[dict]) -> Iterable[dict]:
+        """Extract the records and their nested arrays with export queries.
+
+        The records and the rows of every nested table are streamed in order of
+        the id of the record, each by a single query, and merged while they are
+        read. Deselected properties are not queried.
+        """
+        condition = self.get_export_condition(context)
+        deselected = self.deselected_properties
+        columns = {
+            name: column
+            for name, column in self.export_columns.items()
+            if name not in deselected
+        }
+        key = self.primary_keys[0]
+        records = self.export_rows(
+            context,
+            export_query(
+                self.filter_table,
+                columns,
+                self.schema,
+                condition,
+                self.export_columns[key],
+            ),
+            list(columns),
+        )
+
+        nested = {}
+        for name, (table, column, nested_columns) in self.export_nested.items():
+            if name in deselected:
+                continue
+            selected = {
+                nested_name: nested_column
+                for nested_name, nested_column in nested_columns.items()
+                if f"{name}.{nested_name}" not in deselected
+            }
+            # The rows are merged on their foreign key, even when it is deselected.
+            selected.setdefault(column, column)
+            query = export_query(
+                table,
+                selected,
+                self.schema["properties"][name]["items"],
+                f"{column} in (select {self.export_columns[key]} "
+                f"from {self.filter_table} where {condition})",
+                column,
+            )
+            nested[name] = (column, self.export_rows(context, query, list(selected)))
+
+        self.logger.info("Exporting the '%s' stream where %s.", self.name, condition)
+        yield from self.instrumentation.timed(
+            merge_nested(records, key, nested), "parse"
+        )
+
+    def request_pages(
+        self, context: Optional[dict], checkpoint: Optional[dict]
+    ) -> Iterable[dict]:
+        """Request the pages one after the other, as the paginator advances."""
+        paginator = self.get_new_paginator(checkpoint, context)
+        decorated_request = self.request_decorator(self._request)
+        pages = 0
+
+        with metrics.http_request_counter(self.name, self.path) as request_counter:
+            request_counter.context = context
+
+            while not paginator.finished:
+                prepared_request = self.prepare_request(
+                    context, next_page_token=paginator.current_value
+                )
+                response = decorated_request(prepared_request, context)
+                request_counter.increment()
+                self.update_sync_costs(prepared_request, response, context)
+
+                last_record = yield from self.parse_page(response, context)
+                if last_record is None:
+                    self.logger.info(
+                        "Pagination stopped after %d pages because no records were "
+                        "found in the last response",
+                        pages,
+                    )
+                    break
+
+                pages += 1
+                paginator.advance(response)
+
+                if self.checkpoint_pages and pages % self.checkpoint_pages == 0:
+                    self.write_checkpoint(context, paginator.current_value, last_record)
+
+    def prefetch_pages(
+        self, context: Optional[dict], checkpoint: Optional[dict]
+    ) -> Iterable[dict]:
+        """Request pages concurrently, emitting their records in order.
+
+        Offsets are known in advance, so up to `concurrent_pages` requests are kept
+        in flight while the records of the oldest page are emitted. The scan stops
+        at the first page without data. With `stream_records` the workers download
+        the whole body, and the records are decoded from memory one at a time.
+        """
+        decorated_request = self.request_decorator(self._request)
+        start = checkpoint["offset"] if checkpoint else 0
+        offsets = itertools.count(start, self.limit_per_request)
+        pages = 0
+
+        def fetch(offset: int) -> Response:
+            prepared_request = self.prepare_request(context, next_page_token=offset)
+            response = decorated_request(prepared_request, context)
+            self.update_sync_costs(prepared_request, response, context)
+            if self.stream_records:
+                # A streamed page would otherwise only have its headers prefetched.
+                start = time.perf_counter()
+                self.logger.debug(
+                    "Prefetched %d bytes of the '%s' stream at offset %d.",
+                    len(response.content),
+                    self.name,
+                    offset,
+                )
+                self.instrumentation.add("request", time.perf_counter() - start)
+            return response
+
+        with ThreadPoolExecutor(
+            max_workers=self.concurrent_pages
+        ) as executor, metrics.http_request_counter(
+            self.name, self.path
+        ) as request_counter:
+            request_counter.context = context
+            pending = deque()
+            for _ in range(self.concurrent_pages):
+                offset = next(offsets)
+                pending.append((offset, executor.submit(fetch, offset)))
+
+            while pending:
+                offset, future = pending.popleft()
+                response = future.result()
+                request_counter.increment()
+
+                last_record = yield from self.parse_page(response, context)
+                if last_record is None:
+                    for _, future in pending:
+                        future.cancel()
+                    break
+
+                pages += 1
+                if self.checkpoint_pages and pages % self.checkpoint_pages == 0:
+                    self.write_checkpoint(
+                        context, offset + self.limit_per_request, last_record
+                    )
+
+                offset = next(offsets)
+                pending.append((offset, executor.submit(fetch, offset)))
+
+    def parse_response(self, response: Response) -> Iterable[dict]:
+        """Parse the response and return an iterator of result records."""
+        if self.stream_records:
+            records = stream_page(response, self.records_prefix)
+        elif self.page_decoder:
+            records = self.parse_typed_page(response)
+        else:
+            records = super().parse_response(response)
+
+        if self.keyset_pagination:
+            records = self.track_cursor(records, response)
+
+        yield from records
+
+    @cached_property
+    def page_decoder(self) -> Optional["msgspec.json.Decoder"]:
+        """Return the decoder of pages into typed records, if they are enabled."""
+        if not self.config.get("typed_records"):
+            return None
+
+        return page_decoder(self.schema, self.name, self.deselected_properties)
+
+    def parse_typed_page(self, response: Response) -> Iterable[Any]:
+        """Decode the page into typed records, or into dicts if it does not fit."""
+        try:
+            page = decode_page(response, self.page_decoder.decode)
+        except msgspec.ValidationError as exc:
+            self.logger.warning(
+                "Page of the '%s' stream does not match the schema (%s), "
+                "decoding it without types.",
+                self.name,
+                exc,
+            )
+            return super().parse_response(response)
+
+        return page.data
+
+    @cached_property
+    def page_sizers(self) -> Dict[Tuple[Tuple[str, Any], ...], PageSizer]:
+        """Page size controllers by partition context."""
+        return {}
+
+    def get_page_sizer(self, context: Optional[dict]) -> Optional[PageSizer]:
+        """Return the page size controller of the partition, if it is adaptive.
+
+        Partitions are synced concurrently and their pages can differ a lot, so
+        each one adapts its own page size, starting from the last learned one.
+        """
+        if not self.config.get("adaptive_page_size"):
+            return None
+
+        key = tuple(sorted((context or {}).items()))
+        with self._tap.lock:
+            if key not in self.page_sizers:
+                self.page_sizers[key] = PageSizer(
+                    size=self.stream_state.get("page_size", self.limit_per_request),
+                    minimum=self.config.get("min_page_size", 100),
+                    maximum=self.config.get("max_page_size", 5000),
+                    target_seconds=self.config.get("target_page_seconds", 10),
+                    max_bytes=self.config.get("max_page_bytes", 50 * 1024 * 1024),
+                )
+
+            return self.page_sizers[key]
+
+    def get_page_size(self, context: Optional[dict]) -> int:
+        """Return the number of records to request per page of the partition."""
+        page_sizer = self.get_page_sizer(context)
+        if page_sizer:
+            return page_sizer.size
+
+        return self.limit_per_request
+
+    def backoff_handler(self, details: Any) -> None:
+        """Log the retry and request smaller pages, unless it was throttled."""
+        super().backoff_handler(details)
+        response = getattr(details.get("exception"), "response", None)
+        # The decorated request is called with the prepared request and context.
+        args = details.get("args", ())
+        page_sizer = self.get_page_sizer(args[1] if len(args) > 1 else None)
+        if page_sizer and (response is None or response.status_code != 429):
+            page_sizer.shrink()
+
+    def track_cursor(
+        self, records: Iterable[dict], response: Response
+    ) -> Iterator[dict]:
+        """Store the latest `lastupdatets` of the page and the id of its record."""
+        cursor = None
+        for record in records:
+            key = (record["lastupdatets"], record[self.primary_keys[0]])
+            if cursor is None or key > cursor:
+                cursor = key
+            yield record
+
+        response._ticketmatic_cursor = cursor
 
     def get_url_params(
         self,
@@ -64,17 +1208,361 @@ class PaginatedTicketmaticStream(TicketmaticStream):
         start_date = self.get_starting_timestamp(context)
 
         params = {
-            "limit": self.limit_per_request,
-            "output": "withlookup",
+            "limit": self.get_page_size(context),
             "offset": next_page_token,
             "lastupdatesince": start_date,
         }
+        # Lookup values are only requested for streams that emit them.
+        if (
+            "lookup" in self.schema["properties"]
+            and "lookup" not in self.deselected_properties
+        ):
+            params["output"] = "withlookup"
+        params.update(self.get_range_params(context, next_page_token))
 
         return params
 
-    def get_new_paginator(self) -> TicketmaticPaginator:
+    @cached_property
+    def fingerprints(self) -> Dict[str, FingerprintStore]:
+        """Stores of record fingerprints by account name."""
+        return {}
+
+    def get_fingerprints(self, context: Optional[dict]) -> Optional[FingerprintStore]:
+        """Return the fingerprints of the account, if unchanged records are skipped."""
+        if not self.config.get("skip_unchanged_records") or not self.config.get(
+            "cache_dir"
+        ):
+            return None
+
+        accountname = self.get_account(context)["accountname"]
+        with self._tap.lock:
+            if accountname not in self.fingerprints:
+                path = Path(self.config["cache_dir"]) / accountname
+                self.fingerprints[accountname] = FingerprintStore(
+                    path / f"{self.name}.fingerprints"
+                )
+
+            return self.fingerprints[accountname]
+
+    @cached_property
+    def key_indexes(self) -> Dict[str, KeyIndex]:
+        """Indexes of the primary keys of the emitted records by account name."""
+        return {}
+
+    def get_key_index(self, context: Optional[dict]) -> Optional[KeyIndex]:
+        """Return the key index of the account, if deleted records are tracked."""
+        if not self.config.get("track_deleted_records") or not self.config.get(
+            "cache_dir"
+        ):
+            return None
+
+        accountname = self.get_account(context)["accountname"]
+        with self._tap.lock:
+            if accountname not in self.key_indexes:
+                path = Path(self.config["cache_dir"]) / accountname
+                self.key_indexes[accountname] = KeyIndex(path / f"{self.name}.ids")
+
+            return self.key_indexes[accountname]
+
+    def request_ids(self, context: Optional[dict]) -> Iterator[int]:
+        """Yield the ids of all records of the account in ascending order.
+
+        Pages only contain the ids, with `output=ids`, and follow each other by id
+        so records that are deleted during the sweep do not shift the pages.
+        """
+        decorated_request = self.request_decorator(self._request)
+        last_id: Optional[int] = None
+        while True:
+            params: Dict[str, Any] = {
+                "output": "ids",
+                "limit": self.ids_per_request,
+                "offset": 0,
+                "orderby": "id",
+            }
+            if last_id is not None:
+                params["filter"] = (
+                    f"select id from {self.filter_table} where id > {last_id}"
+                )
+
+            prepared_request = self.prepare_request(context, next_page_token=None)
+            prepared_request.prepare_url(self.get_url(context), params)
+            response = decorated_request(prepared_request, context)
+            page = decode_page(response, self._tap.json_backend.loads)
+
+            ids = [
+                record.get(self.primary_keys[0], record.get("id"))
+                for record in page.get("data", [])
+            ]
+            if not ids:
+                return
+
+            for id_ in ids:
+                if last_id is not None and id_ <= last_id:
+                    raise ValueError(f"ids are not ascending at {id_}")
+                last_id = id_
+                yield id_
+
+    def sweep_deleted_records(self, context: Optional[dict]) -> None:
+        """Emit deletion markers for the records that are no longer listed.
+
+        The ids that Ticketmatic lists are compared with the keys of the emitted
+        records. Records that were deleted or archived since are emitted with only
+        their primary key and `_sdc_deleted_at`.
+        """
+        key_index = self.get_key_index(context)
+        if not key_index or not self.filter_table:
+            return
+
+        # Markers are only emitted for a complete sweep, an interrupted one would
+        # mark every record after the last listed id as deleted.
+        try:
+            deleted = list(key_index.sweep(self.request_ids(context)))
+        except ValueError as exc:
+            self.logger.warning(
+                "Stopped the sweep for deleted records of the '%s' stream: %s.",
+                self.name,
+                exc,
+            )
+            return
+
+        deleted_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        records = []
+        for key in deleted:
+            record = {self.primary_keys[0]: key, "_sdc_deleted_at": deleted_at}
+            if context and "accountname" in context:
+                record["accountname"] = context["accountname"]
+            records.append(record)
+
+        batch_config = self.get_batch_config(self.config)
+        if not batch_config:
+            for record in records:
+                self._write_record_message(record)
+        elif records:
+            batcher = Batcher(self.tap_name, self.name, batch_config)
+            for manifest in batcher.get_batches(records=iter(records)):
+                self._write_batch_message(
+                    encoding=batch_config.encoding, manifest=manifest
+                )
+
+        self.logger.info(
+            "Marked %d records of the '%s' stream as deleted.", len(records), self.name
+        )
+
+    def post_process(self, row: dict, context: Optional[dict] = None) -> Optional[dict]:
+        """Drop records that did not change since they were last emitted.
+
+        Only properties in the schema are compared, and the replication key is left
+        out because it moves on every update.
+        """
+        row = super().post_process(row, context)
+
+        key_index = self.get_key_index(context)
+        if key_index:
+            key_index.add(row[self.primary_keys[0]])
+
+        fingerprints = self.get_fingerprints(context)
+        if fingerprints:
+            payload = dict(row)
+            payload.pop(self.replication_key, None)
+            if not fingerprints.is_changed(row[self.primary_keys[0]], payload):
+                return None
+
+        return row
+
+    def get_records(self, context: Optional[dict]) -> Iterable[dict]:
+        """Return the records, then store the fingerprints, keys and page size."""
+        yield from super().get_records(context)
+
+        fingerprints = self.get_fingerprints(context)
+        if fingerprints:
+            fingerprints.save()
+
+        key_index = self.get_key_index(context)
+        if key_index:
+            key_index.save()
+
+        # The learned page size is the starting point of the next run.
+        page_sizer = self.get_page_sizer(context)
+        if page_sizer:
+            with self._tap.lock:
+                self.stream_state["page_size"] = page_sizer.size
+
+    def get_new_paginator(
+        self, checkpoint: Optional[dict] = None, context: Optional[dict] = None
+    ) -> BaseAPIPaginator:
         """Paginator that focuses on fetching the based on the result the API returns."""
+        if self.keyset_pagination:
+            return TicketmaticKeysetPaginator(
+                start_value=checkpoint["cursor"] if checkpoint else None
+            )
+
         return TicketmaticPaginator(
-            start_value=0,
-            page_size=self.limit_per_request,
+            start_value=checkpoint["offset"] if checkpoint else 0,
+            page_size=self.get_page_size(context),
         )
+
+
+class SettingsTicketmaticStream(TicketmaticStream):
+    """Ticketmatic stream for settings, which are returned in a single response.
+
+    Settings are synced incrementally on `lastupdatets`. Only settings updated
+    since the bookmark are requested, and the tap skips older ones itself for
+    endpoints that do not filter them.
+    """
+
+    # Whether the endpoint only returns records updated since `lastupdatesince`.
+    filters_lastupdatesince = True
+
+    def get_bookmark(self, context: Optional[dict]) -> Optional[str]:
+        """Return the latest `lastupdatets` that a previous run emitted.
+
+        Settings are not limited by the `start_date` of the transactional streams,
+        so the first run returns all of them.
+        """
+        if self.replication_method != REPLICATION_INCREMENTAL:
+            return None
+
+        state = self.get_context_state(context)
+        if state.get("replication_key") != self.replication_key:
+            return None
+
+        return state.get("replication_key_value")
+
+    def get_url_params(
+        self,
+        context: Optional[dict],
+        next_page_token: Optional[Any],
+    ) -> Dict[str, Any]:
+        """Return the parameters, asking only for settings updated since the bookmark."""
+        params = super().get_url_params(context, next_page_token)
+        bookmark = self.get_bookmark(context)
+        if bookmark and self.filters_lastupdatesince:
+            params["lastupdatesince"] = bookmark
+
+        return params
+
+    @cached_property
+    def record_caches(self) -> Dict[str, RecordCache]:
+        """Caches of emitted records by account name."""
+        return {}
+
+    def get_record_cache(self, context: Optional[dict]) -> Optional[RecordCache]:
+        """Return the cache of the account, if unchanged settings are skipped."""
+        if not self.config.get("skip_unchanged_settings") or not self.config.get(
+            "cache_dir"
+        ):
+            return None
+
+        accountname = self.get_account(context)["accountname"]
+        with self._tap.lock:
+            if accountname not in self.record_caches:
+                path = Path(self.config["cache_dir"]) / accountname
+                self.record_caches[accountname] = RecordCache(
+                    path / f"{self.name}.json",
+                    ttl=self.config.get("cache_ttl", 7 * 24 * 3600),
+                )
+
+            return self.record_caches[accountname]
+
+    def prepare_request(
+        self, context: Optional[dict], next_page_token: Optional[Any]
+    ) -> requests.PreparedRequest:
+        """Prepare the request, asking the API to skip the body if nothing changed."""
+        prepared_request = super().prepare_request(context, next_page_token)
+        record_cache = self.get_record_cache(context)
+        if record_cache and record_cache.valid_etag:
+            prepared_request.headers["If-None-Match"] = record_cache.valid_etag
+
+        return prepared_request
+
+    def _request(
+        self, prepared_request: requests.PreparedRequest, context: Optional[dict]
+    ) -> Response:
+        """Send the request and store the ETag of the response in the cache."""
+        response = super()._request(prepared_request, context)
+        record_cache = self.get_record_cache(context)
+        if record_cache:
+            if response.status_code == 304:
+                record_cache.not_modified = True
+            else:
+                record_cache.update_etag(response.headers.get("ETag"))
+
+        return response
+
+    def parse_response(self, response: Response) -> Iterable[dict]:
+        """Parse the response and return an iterator of result records."""
+        if response.status_code == 304:
+            return
+
+        yield from self.instrumentation.timed(super().parse_response(response), "parse")
+
+    def get_records(self, context: Optional[dict]) -> Iterable[dict]:
+        """Return the records that changed since they were last emitted."""
+        # Records at the bookmark are returned again, as others may share it.
+        bookmark = self.get_bookmark(context)
+        record_cache = self.get_record_cache(context)
+
+        for record in super().get_records(context):
+            if bookmark and (record.get(self.replication_key) or bookmark) < bookmark:
+                continue
+            if record_cache and not record_cache.is_changed(
+                record[self.primary_keys[0]], record
+            ):
+                continue
+
+            yield record
+
+        # All records were written by now, so the cache can be updated. Settings
+        # that were not updated since the bookmark were not in the response.
+        if record_cache:
+            record_cache.save(evict=not bookmark)
+
+
+class NestedTicketmaticStream(TicketmaticStream):
+    """Stream of the records that are nested in the records of its parent stream.
+
+    The records are emitted by the parent stream while it processes its own
+    records, so they are taken from the page that was already fetched.
+    """
+
+    # Property of the parent records that holds the nested records.
+    parent_property: str
+
+    def get_records(self, context: Optional[dict]) -> Iterable[dict]:
+        """Return no records, nested records are emitted by the parent stream."""
+        return []
+
+    @cached_property
+    def batch_writer(self) -> Optional[JSONLinesBatchWriter]:
+        """Return the writer of batch files, if the tap runs in batch mode."""
+        batch_config = self.get_batch_config(self.config)
+        if not batch_config:
+            return None
+
+        return JSONLinesBatchWriter(
+            self.tap_name, self.name, batch_config, self._tap.json_backend.dumps
+        )
+
+    def emit_nested_records(self, parent_record: dict) -> None:
+        """Write the records nested in a conformed record of the parent stream."""
+        for record in parent_record.get(self.parent_property) or []:
+            if "accountname" in parent_record:
+                record = {**record, "accountname": parent_record["accountname"]}
+
+            if self.batch_writer:
+                self.write_batch(self.batch_writer.write(record))
+            else:
+                # The SDK removes deselected properties in place, the parent needs them.
+                self._write_record_message(dict(record))
+
+    def flush_nested_records(self) -> None:
+        """Emit the batch file that is still being written, if any."""
+        if self.batch_writer:
+            self.write_batch(self.batch_writer.close())
+
+    def write_batch(self, url: Optional[str]) -> None:
+        """Write a BATCH message for a finished batch file."""
+        if url:
+            self._write_batch_message(
+                encoding=self.batch_writer.encoding, manifest=[url]
+            )
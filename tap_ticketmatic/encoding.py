@@ -0,0 +1,108 @@
+"""JSON backends that decode the responses and encode the Singer messages.
+
+The standard library decodes every number with a fraction into a Decimal and the
+SDK encodes messages with simplejson, both largely in Python. orjson and msgspec
+do the same work in native code.
+"""
+
+import decimal
+import json
+from typing import Any, Dict, Type
+
+from singer_sdk._singerlib.json import serialize_json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class JSONBackend:
+    """Decodes and encodes JSON with the standard library, like the SDK does."""
+
+    name = "json"
+
+    def loads(self, data: bytes) -> Any:
+        """Decode JSON, with numbers that have a fraction as Decimals."""
+        return json.loads(data, parse_float=decimal.Decimal)
+
+    def dumps(self, value: Any) -> bytes:
+        """Encode a value, with Decimals as numbers and datetimes in ISO format."""
+        return serialize_json(value).encode()
+
+
+class OrjsonBackend(JSONBackend):
+    """Decodes and encodes JSON with orjson.
+
+    orjson decodes numbers with a fraction as floats. A float is encoded with the
+    shortest digits that read back as the same float, so amounts keep their
+    value up to 15 significant digits. Decimals are written as JSON numbers.
+    """
+
+    name = "orjson"
+
+    def loads(self, data: bytes) -> Any:
+        """Decode JSON, with numbers that have a fraction as floats."""
+        return orjson.loads(data)
+
+    def dumps(self, value: Any) -> bytes:
+        """Encode a value, with Decimals as numbers and datetimes in ISO format."""
+        return orjson.dumps(
+            value, default=orjson_default, option=orjson.OPT_NON_STR_KEYS
+        )
+
+
+def orjson_default(value: Any) -> Any:
+    """Encode the values that orjson does not support itself."""
+    if isinstance(value, decimal.Decimal):
+        return orjson.Fragment(str(value))
+
+    return str(value)
+
+
+class MsgspecBackend(JSONBackend):
+    """Decodes and encodes JSON with msgspec, with numbers as Decimals."""
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        self.decoder = msgspec.json.Decoder(float_hook=decimal.Decimal)
+        self.encoder = msgspec.json.Encoder(enc_hook=str, decimal_format="number")
+
+    def loads(self, data: bytes) -> Any:
+        """Decode JSON, with numbers that have a fraction as Decimals."""
+        return self.decoder.decode(data)
+
+    def dumps(self, value: Any) -> bytes:
+        """Encode a value, with Decimals as numbers and datetimes in ISO format."""
+        return self.encoder.encode(value)
+
+
+BACKENDS: Dict[str, Type[JSONBackend]] = {
+    "orjson": OrjsonBackend,
+    "msgspec": MsgspecBackend,
+    "json": JSONBackend,
+}
+
+# Modules that the backends need, None when they are not installed.
+MODULES = {"orjson": orjson, "msgspec": msgspec, "json": json}
+
+# Backends that `auto` picks from, in order. They keep amounts as Decimals, orjson
+# decodes them as floats and is only used when it is named.
+AUTO_BACKENDS = ("msgspec", "json")
+
+
+def get_backend(name: str = "auto") -> JSONBackend:
+    """Return the named backend, or the fastest installed one for `auto`."""
+    if name == "auto":
+        name = next(name for name in AUTO_BACKENDS if MODULES[name] is not None)
+
+    if MODULES[name] is None:
+        raise ImportError(f"The {name} JSON backend requires the {name} package.")
+
+    return BACKENDS[name]()
@@ -0,0 +1,163 @@
+"""Timings and counters of the work that the streams do, with a metrics export."""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+# Phases of a sync in the order in which a record passes through them.
+PHASES = ["throttle", "backoff", "request", "parse", "validate", "emit"]
+
+# Counters of every stream, with the help text of their metric.
+COUNTERS = {
+    "requests": "Requests sent to Ticketmatic, including retries.",
+    "retries": "Requests that failed and were retried.",
+    "throttled": "Requests that Ticketmatic answered with 429 Too Many Requests.",
+    "bytes": "Bytes of the response bodies, as sent by Ticketmatic.",
+    "pages": "Pages with records that were parsed.",
+    "records": "Records that were parsed from the responses.",
+    "emitted": "Records that were written to stdout.",
+}
+
+
+class StreamMetrics:
+    """Counters and time per phase of one stream, shared by all its threads."""
+
+    def __init__(self) -> None:
+        """Start with all counters and timings at zero."""
+        self.lock = threading.Lock()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+
+    def add(self, phase: str, seconds: float, **counters: int) -> None:
+        """Add the time spent in a phase and increment the counters."""
+        with self.lock:
+            self.seconds[phase] += seconds
+            for name, value in counters.items():
+                self.counters[name] += value
+
+    def count(self, **counters: int) -> None:
+        """Increment the counters."""
+        with self.lock:
+            for name, value in counters.items():
+                self.counters[name] += value
+
+    def timed(self, items: Iterable[T], phase: str) -> Iterator[T]:
+        """Yield the items, adding the time spent producing them to the phase.
+
+        Time spent by the consumer between items is not counted. The time and
+        the number of items are added once, when the items are exhausted.
+        """
+        iterator = iter(items)
+        seconds = 0.0
+        count = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                seconds += time.perf_counter() - start
+                break
+
+            seconds += time.perf_counter() - start
+            count += 1
+            yield item
+
+        self.add(phase, seconds, pages=1 if count else 0, records=count)
+
+    def summary(self) -> str:
+        """Return a one-line summary of the counters and timings."""
+        counters = self.counters
+        pages = counters["pages"] or 1
+        timings = ", ".join(
+            f"{phase} {seconds:.1f}s" for phase, seconds in self.seconds.items()
+        )
+        return (
+            f"{counters['requests']} requests ({counters['retries']} retried, "
+            f"{counters['throttled']} throttled), "
+            f"{counters['bytes'] / 1024 / 1024:.1f} MB, "
+            f"{counters['records']} records in {counters['pages']} pages "
+            f"({counters['records'] / pages:.0f} per page), "
+            f"{counters['emitted']} emitted; {timings}"
+        )
+
+
+class Instrumentation:
+    """The metrics of all streams of a run of the tap."""
+
+    def __init__(self) -> None:
+        """Start the run without metrics."""
+        self.lock = threading.Lock()
+        self.streams: Dict[str, StreamMetrics] = {}
+        self.started = time.time()
+
+    def stream(self, name: str) -> StreamMetrics:
+        """Return the metrics of a stream, created on first use."""
+        with self.lock:
+            if name not in self.streams:
+                self.streams[name] = StreamMetrics()
+
+            return self.streams[name]
+
+    def log_summary(self, log: Callable[..., None]) -> None:
+        """Log the metrics of every stream that sent requests or emitted records."""
+        for name, metrics in sorted(self.streams.items()):
+            if metrics.counters["requests"] or metrics.counters["emitted"]:
+                log("Stream '%s': %s", name, metrics.summary())
+
+    def export(self, openmetrics: bool = False) -> str:
+        """Return the metrics in the Prometheus or OpenMetrics text format."""
+        lines: List[str] = []
+
+        def counter(name: str, help_text: str, samples: Dict[str, float]) -> None:
+            metric = f"tap_ticketmatic_{name}_total"
+            # OpenMetrics names the family of a counter without the suffix.
+            family = metric[: -len("_total")] if openmetrics else metric
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} counter")
+            for labels, value in samples.items():
+                lines.append(f"{metric}{{{labels}}} {value}")
+
+        for name, help_text in COUNTERS.items():
+            counter(
+                name,
+                help_text,
+                {
+                    f'stream="{stream}"': metrics.counters[name]
+                    for stream, metrics in sorted(self.streams.items())
+                },
+            )
+
+        counter(
+            "phase_seconds",
+            "Seconds spent per phase of the sync.",
+            {
+                f'stream="{stream}",phase="{phase}"': round(seconds, 6)
+                for stream, metrics in sorted(self.streams.items())
+                for phase, seconds in metrics.seconds.items()
+            },
+        )
+
+        for name, help_text, value in [
+            ("run_seconds", "Duration of the run.", time.time() - self.started),
+            ("last_run_timestamp_seconds", "End of the run.", time.time()),
+        ]:
+            metric = f"tap_ticketmatic_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {round(value, 3)}")
+
+        if openmetrics:
+            lines.append("# EOF")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path, openmetrics: bool = False) -> None:
+        """Write the metrics to `path`, replacing it at once for textfile collectors."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(self.export(openmetrics))
+        tmp_path.replace(path)
@@ -0,0 +1,97 @@
+"""Rate limiting of the requests that all streams send to Ticketmatic."""
+
+import datetime
+import email.utils
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from requests import Response
+
+
+def retry_after_seconds(response: Optional[Response]) -> Optional[float]:
+    """Return the number of seconds in the `Retry-After` header of the response."""
+    if response is None or not response.headers.get("Retry-After"):
+        return None
+
+    value = response.headers["Retry-After"].strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    now = datetime.datetime.now(retry_at.tzinfo or datetime.timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+class RateLimiter:
+    """Token bucket that hands out requests round-robin over its callers.
+
+    Every request takes a token, and tokens are added at `rate` per second up to
+    `burst`. Waiting requests are queued per key, typically a stream, and the keys
+    take turns, so a stream with many page prefetchers cannot starve the others.
+    Without a rate, requests only wait while the limiter is paused.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.condition = threading.Condition()
+        # Waiting requests per key, in the order in which the keys take turns.
+        self.queues: Dict[str, deque] = {}
+
+    def refill(self, now: float) -> None:
+        """Add the tokens that were earned since the last refill."""
+        if self.rate:
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+        self.updated = now
+
+    def acquire(self, key: str) -> None:
+        """Wait until the request of `key` may be sent."""
+        if not self.rate and self.paused_until <= time.monotonic():
+            return
+
+        ticket = object()
+        with self.condition:
+            self.queues.setdefault(key, deque()).append(ticket)
+
+            while True:
+                now = time.monotonic()
+                self.refill(now)
+
+                wait: Optional[float] = None
+                turn = next(iter(self.queues))
+                if self.queues[turn][0] is ticket:
+                    wait = self.paused_until - now
+                    if self.rate and self.tokens < 1:
+                        wait = max(wait, (1 - self.tokens) / self.rate)
+
+                    if wait <= 0:
+                        self.tokens = max(0.0, self.tokens - 1)
+                        # Move the key behind the other waiting keys.
+                        queue = self.queues.pop(turn)
+                        queue.popleft()
+                        if queue:
+                            self.queues[turn] = queue
+                        self.condition.notify_all()
+                        return
+
+                self.condition.wait(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold all requests for `seconds`, after the API asked to slow down."""
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.condition.notify_all()
@@ -0,0 +1,206 @@
+"""Compiled conformance and validation of records against stream schemas.
+
+The SDK walks the JSON schema for every property of every record to find out how
+it should be conformed. The functions in this module walk the schema once and
+return closures that only do the work the schema requires.
+
+The schemas of the streams are built and compiled on first use, so a run that
+syncs a few streams does not pay for the others.
+"""
+
+import decimal
+import threading
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+# Conforms a value and appends the paths of properties that are not in the schema.
+Conformer = Callable[[Any, List[str]], Any]
+
+# Appends a message for every value that does not match the schema.
+Validator = Callable[[Any, List[str]], None]
+
+PYTHON_TYPES = {
+    "integer": (int,),
+    "number": (int, float, decimal.Decimal),
+    "string": (str,),
+    "boolean": (bool,),
+    "object": (dict,),
+    "array": (list,),
+}
+
+
+class LazySchema:
+    """Class attribute with a schema that is built when it is first read.
+
+    Assigning `schema` on a stream instance still overrides it for that stream.
+    """
+
+    def __init__(self, build: Callable[[], dict]) -> None:
+        self.build = build
+        self.schema: Optional[dict] = None
+        self.lock = threading.Lock()
+
+    def __get__(self, instance: Any, owner: type) -> dict:
+        if self.schema is None:
+            with self.lock:
+                if self.schema is None:
+                    self.schema = self.build()
+
+        return self.schema
+
+
+class CompiledSchema:
+    """Class attribute with a function compiled from the `schema` of the class.
+
+    The function is compiled once per class, when it is first read.
+    """
+
+    def __init__(self, compile: Callable[[dict], Any]) -> None:
+        self.compile = compile
+        self.compiled: Dict[type, Any] = {}
+        self.lock = threading.Lock()
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        if owner not in self.compiled:
+            with self.lock:
+                if owner not in self.compiled:
+                    self.compiled[owner] = self.compile(owner.schema)
+
+        return self.compiled[owner]
+
+
+def schema_types(schema: dict) -> List[str]:
+    """Return the JSON types that a schema allows."""
+    types = schema.get("type", [])
+    types = [types] if isinstance(types, str) else list(types)
+    for subschema in schema.get("anyOf", []):
+        types.extend(schema_types(subschema))
+
+    return types
+
+
+def compile_conformer(
+    schema: dict, path: str = "", deselected: FrozenSet[str] = frozenset()
+) -> Optional[Conformer]:
+    """Return a function that conforms values to the schema like the SDK does.
+
+    Properties that are not in the schema are removed unless additional properties
+    are allowed, and numbers are converted for boolean-only properties. None is
+    returned for schemas whose values pass through unchanged. Properties whose
+    dotted path is in `deselected` are removed without being reported.
+    """
+    types = schema_types(schema)
+
+    if "object" in types and "properties" in schema:
+        properties = {
+            name: compile_conformer(subschema, f"{path}{name}.", deselected)
+            for name, subschema in schema["properties"].items()
+            if f"{path}{name}" not in deselected
+        }
+        dropped = {
+            name for name in schema["properties"] if f"{path}{name}" in deselected
+        }
+        additional = schema.get("additionalProperties")
+
+        def conform_object(value: Any, unmapped: List[str]) -> Any:
+            if not isinstance(value, dict):
+                return value
+
+            result = {}
+            for key, item in value.items():
+                if key in properties:
+                    conform = properties[key]
+                    result[key] = item if conform is None else conform(item, unmapped)
+                elif key in dropped:
+                    continue
+                else:
+                    unmapped.append(f"{path}{key}")
+                    if additional:
+                        result[key] = item
+
+            return result
+
+        return conform_object
+
+    if "array" in types and isinstance(schema.get("items"), dict):
+        conform_item = compile_conformer(schema["items"], path, deselected)
+        if conform_item is None:
+            return None
+
+        def conform_array(value: Any, unmapped: List[str]) -> Any:
+            if not isinstance(value, list):
+                return value
+
+            return [conform_item(item, unmapped) for item in value]
+
+        return conform_array
+
+    if types and set(types) <= {"boolean", "null"}:
+
+        def conform_boolean(value: Any, unmapped: List[str]) -> Any:
+            return None if value is None else value != 0
+
+        return conform_boolean
+
+    return None
+
+
+def deselected_paths(mask: Dict[Tuple[str, ...], bool]) -> FrozenSet[str]:
+    """Return the dotted paths of the properties that a selection mask excludes."""
+    paths = set()
+    for breadcrumb, selected in mask.items():
+        if selected or not breadcrumb:
+            continue
+
+        names = []
+        index = 0
+        while index < len(breadcrumb) - 1:
+            if breadcrumb[index] == "properties":
+                names.append(breadcrumb[index + 1])
+                index += 2
+            else:
+                index += 1
+        paths.add(".".join(names))
+
+    return frozenset(paths)
+
+
+def compile_validator(schema: dict, path: str = "$") -> Validator:
+    """Return a function that checks the types of a value against the schema."""
+    types = schema_types(schema)
+    python_types = tuple(
+        python_type for name in types for python_type in PYTHON_TYPES.get(name, ())
+    )
+    nullable = not types or "null" in types
+    properties = {
+        name: compile_validator(subschema, f"{path}.{name}")
+        for name, subschema in schema.get("properties", {}).items()
+    }
+    items = (
+        compile_validator(schema["items"], f"{path}[]")
+        if isinstance(schema.get("items"), dict)
+        else None
+    )
+
+    def validate(value: Any, errors: List[str]) -> None:
+        if value is None:
+            if not nullable:
+                errors.append(f"{path} is null")
+            return
+
+        if python_types and (
+            not isinstance(value, python_types)
+            or (isinstance(value, bool) and "boolean" not in types)
+        ):
+            errors.append(f"{path} is {type(value).__name__}, expected {types}")
+            return
+
+        if properties and isinstance(value, dict):
+            for key, item in value.items():
+                if key in properties:
+                    properties[key](item, errors)
+
+        if items and isinstance(value, list):
+            for item in value:
+                items(item, errors)
+
+    return validate
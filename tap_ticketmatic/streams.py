@@ -1,8 +1,15 @@
 """Stream type classes for tap-ticketmatic."""
 
 from singer_sdk import typing as th
-from tap_ticketmatic.client import TicketmaticStream, PaginatedTicketmaticStream
-from typing import Any, Dict, Optional
+from singer_sdk.helpers._batch import BaseBatchFileEncoding, BatchConfig
+from tap_ticketmatic.client import (
+    NestedTicketmaticStream,
+    PaginatedTicketmaticStream,
+    SettingsTicketmaticStream,
+)
+from tap_ticketmatic.schema import LazySchema, deselected_paths
+from functools import cached_property
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 
 class Orders(PaginatedTicketmaticStream):
@@ -10,126 +17,301 @@ class Orders(PaginatedTicketmaticStream):
 
     name = "orders"
     path = "/orders"
+    filter_table = "tm.order"
     primary_keys = ["orderid"]
-    replication_key = "lastupdatets"
-
-    schema = th.PropertiesList(
-        th.Property("orderid", th.IntegerType),
-        th.Property("amountpaid", th.NumberType),
-        th.Property("calculate_ordercosts", th.BooleanType),
-        th.Property("code", th.StringType),
-        th.Property("customerid", th.IntegerType),
-        th.Property(
-            "deferredpaymentproperties",
-            th.ObjectType(
-                th.Property("bankAccount", th.StringType),
-                th.Property("bankBic", th.StringType),
-                th.Property("bankName", th.StringType),
-                th.Property("transferReference", th.StringType),
-            ),
+    export_columns = {
+        "orderid": "id",
+        "amountpaid": "amountpaid",
+        "code": "code",
+        "customerid": "customerid",
+        "deliveryscenarioid": "deliveryscenarioid",
+        "deliverystatus": "deliverystatus",
+        "expiryhandled": "expiryhandled",
+        "expiryts": "expiryts",
+        "nbroftickets": "nbroftickets",
+        "paymentscenarioid": "paymentscenarioid",
+        "paymentstatus": "paymentstatus",
+        "rappelhandled": "rappelhandled",
+        "rappelts": "rappelts",
+        "saleschannelid": "saleschannelid",
+        "status": "status",
+        "totalamount": "totalamount",
+        "webskinid": "webskinid",
+        "createdts": "createdts",
+        "lastupdatets": "lastupdatets",
+        "c_remark": "c_remark",
+        "c_podiumpascode": "c_podiumpascode",
+        "c_donatie": "c_donatie",
+    }
+    export_nested = {
+        "tickets": (
+            "tm.ticket",
+            "orderid",
+            {
+                "id": "id",
+                "orderid": "orderid",
+                "tickettypeid": "tickettypeid",
+                "tickettypepriceid": "tickettypepriceid",
+                "price": "price",
+                "servicecharge": "servicecharge",
+                "ticketholderid": "ticketholderid",
+                "vouchercodeid": "vouchercodeid",
+                "bundleid": "bundleid",
+                "barcode": "barcode",
+            },
         ),
-        th.Property(
-            "deliveryaddress",
-            th.ObjectType(
-                th.Property("city", th.StringType),
-                th.Property("street1", th.StringType),
-            ),
+        "payments": (
+            "tm.payment",
+            "orderid",
+            {
+                "id": "id",
+                "orderid": "orderid",
+                "amount": "amount",
+                "paidts": "paidts",
+                "paymentmethodid": "paymentmethodid",
+                "refundpaymentid": "refundpaymentid",
+            },
         ),
-        th.Property("deliveryscenarioid", th.IntegerType),
-        th.Property("deliverystatus", th.IntegerType),
-        th.Property("expiryhandled", th.BooleanType),
-        th.Property("expiryts", th.DateTimeType),
-        th.Property("firstname", th.StringType),
-        th.Property("hasopenpaymentrequest", th.BooleanType),
-        th.Property("isauthenticatedcustomer", th.BooleanType),
-        th.Property("lastname", th.StringType),
-        th.Property("lookup", th.ArrayType(th.StringType)),
-        th.Property("nbroftickets", th.IntegerType),
-        th.Property(
-            "ordercosts",
-            th.ArrayType(
+    }
+    replication_key = "lastupdatets"
+
+    schema = LazySchema(
+        lambda: th.PropertiesList(
+            th.Property("orderid", th.IntegerType),
+            th.Property("amountpaid", th.NumberType),
+            th.Property("calculate_ordercosts", th.BooleanType),
+            th.Property("code", th.StringType),
+            th.Property("customerid", th.IntegerType),
+            th.Property(
+                "deferredpaymentproperties",
                 th.ObjectType(
-                    th.Property("orderid", th.IntegerType),
-                    th.Property("amount", th.NumberType),
-                    th.Property("servicechargedefinitionid", th.IntegerType),
-                )
+                    th.Property("bankAccount", th.StringType),
+                    th.Property("bankBic", th.StringType),
+                    th.Property("bankName", th.StringType),
+                    th.Property("transferReference", th.StringType),
+                ),
             ),
-        ),
-        th.Property(
-            "payments",
-            th.ArrayType(
+            th.Property(
+                "deliveryaddress",
                 th.ObjectType(
-                    th.Property("id", th.IntegerType),
-                    th.Property("orderid", th.IntegerType),
-                    th.Property("amount", th.NumberType),
-                    th.Property("paidts", th.DateTimeType),
-                    th.Property("paymentmethodid", th.IntegerType),
-                    th.Property("properties", th.ObjectType()),
-                    th.Property("refundpaymentid", th.IntegerType),
-                )
+                    th.Property("city", th.StringType),
+                    th.Property("street1", th.StringType),
+                ),
             ),
-        ),
-        th.Property("paymentscenarioid", th.IntegerType),
-        th.Property("paymentstatus", th.IntegerType),
-        th.Property(
-            "products",
-            th.ArrayType(
-                th.ObjectType(
-                    th.Property("id", th.IntegerType),
-                    th.Property("orderid", th.IntegerType),
-                    th.Property("code", th.StringType),
-                    th.Property("contactid", th.IntegerType),
-                    th.Property("price", th.NumberType),
-                    th.Property("productid", th.IntegerType),
-                    th.Property("properties", th.ObjectType()),
-                )
+            th.Property("deliveryscenarioid", th.IntegerType),
+            th.Property("deliverystatus", th.IntegerType),
+            th.Property("expiryhandled", th.BooleanType),
+            th.Property("expiryts", th.DateTimeType),
+            th.Property("firstname", th.StringType),
+            th.Property("hasopenpaymentrequest", th.BooleanType),
+            th.Property("isauthenticatedcustomer", th.BooleanType),
+            th.Property("lastname", th.StringType),
+            th.Property("lookup", th.ArrayType(th.StringType)),
+            th.Property("nbroftickets", th.IntegerType),
+            th.Property(
+                "ordercosts",
+                th.ArrayType(
+                    th.ObjectType(
+                        th.Property("orderid", th.IntegerType),
+                        th.Property("amount", th.NumberType),
+                        th.Property("servicechargedefinitionid", th.IntegerType),
+                    )
+                ),
             ),
-        ),
-        th.Property("promocodes", th.ArrayType(th.StringType)),
-        th.Property("queuetokens", th.ArrayType(th.IntegerType)),
-        th.Property("rappelhandled", th.BooleanType),
-        th.Property("rappelts", th.DateTimeType),
-        th.Property("saleschannelid", th.IntegerType),
-        th.Property("status", th.IntegerType),
-        th.Property(
-            "tickets",
-            th.ArrayType(
-                th.ObjectType(
-                    th.Property("orderid", th.IntegerType),
-                    th.Property("id", th.IntegerType),
-                    th.Property("tickettypeid", th.IntegerType),
-                    th.Property("seatzoneid", th.IntegerType),
-                    th.Property("seated_ref", th.StringType),
-                    th.Property("price", th.NumberType),
-                    th.Property("tickettypepriceid", th.IntegerType),
-                    th.Property("servicecharge", th.NumberType),
-                    th.Property("ticketholderid", th.IntegerType),
-                    th.Property("ticketname", th.StringType),
-                    th.Property("vouchercodeid", th.IntegerType),
-                    th.Property("bundleid", th.IntegerType),
-                    th.Property("barcode", th.StringType),
-                    th.Property("deliveredts", th.StringType),
-                    th.Property("transferredto", th.IntegerType),
-                    th.Property("cachedaccesscontrolstatus", th.IntegerType),
-                    th.Property("eventid", th.IntegerType),
-                    th.Property("pricetypeid", th.IntegerType),
-                    th.Property("seatdescription", th.StringType),
-                    th.Property("seatname", th.StringType),
-                    th.Property("seatcachedvisualx", th.NumberType),
-                    th.Property("seatcachedvisualy", th.NumberType),
-                    th.Property("tickettypename", th.StringType),
-                    th.Property("bundlevariant", th.StringType),
-                )
+            th.Property(
+                "payments",
+                th.ArrayType(
+                    th.ObjectType(
+                        th.Property("id", th.IntegerType),
+                        th.Property("orderid", th.IntegerType),
+                        th.Property("amount", th.NumberType),
+                        th.Property("paidts", th.DateTimeType),
+                        th.Property("paymentmethodid", th.IntegerType),
+                        th.Property("properties", th.ObjectType()),
+                        th.Property("refundpaymentid", th.IntegerType),
+                    )
+                ),
             ),
-        ),
-        th.Property("totalamount", th.NumberType),
-        th.Property("webskinid", th.IntegerType),
-        th.Property("createdts", th.DateTimeType),
-        th.Property("lastupdatets", th.DateTimeType),
-        th.Property("c_remark", th.StringType),
-        th.Property("c_podiumpascode", th.StringType),
-        th.Property("c_donatie", th.IntegerType),
-    ).to_dict()
+            th.Property("paymentscenarioid", th.IntegerType),
+            th.Property("paymentstatus", th.IntegerType),
+            th.Property(
+                "products",
+                th.ArrayType(
+                    th.ObjectType(
+                        th.Property("id", th.IntegerType),
+                        th.Property("orderid", th.IntegerType),
+                        th.Property("code", th.StringType),
+                        th.Property("contactid", th.IntegerType),
+                        th.Property("price", th.NumberType),
+                        th.Property("productid", th.IntegerType),
+                        th.Property("properties", th.ObjectType()),
+                    )
+                ),
+            ),
+            th.Property("promocodes", th.ArrayType(th.StringType)),
+            th.Property("queuetokens", th.ArrayType(th.IntegerType)),
+            th.Property("rappelhandled", th.BooleanType),
+            th.Property("rappelts", th.DateTimeType),
+            th.Property("saleschannelid", th.IntegerType),
+            th.Property("status", th.IntegerType),
+            th.Property(
+                "tickets",
+                th.ArrayType(
+                    th.ObjectType(
+                        th.Property("orderid", th.IntegerType),
+                        th.Property("id", th.IntegerType),
+                        th.Property("tickettypeid", th.IntegerType),
+                        th.Property("seatzoneid", th.IntegerType),
+                        th.Property("seated_ref", th.StringType),
+                        th.Property("price", th.NumberType),
+                        th.Property("tickettypepriceid", th.IntegerType),
+                        th.Property("servicecharge", th.NumberType),
+                        th.Property("ticketholderid", th.IntegerType),
+                        th.Property("ticketname", th.StringType),
+                        th.Property("vouchercodeid", th.IntegerType),
+                        th.Property("bundleid", th.IntegerType),
+                        th.Property("barcode", th.StringType),
+                        th.Property("deliveredts", th.StringType),
+                        th.Property("transferredto", th.IntegerType),
+                        th.Property("cachedaccesscontrolstatus", th.IntegerType),
+                        th.Property("eventid", th.IntegerType),
+                        th.Property("pricetypeid", th.IntegerType),
+                        th.Property("seatdescription", th.StringType),
+                        th.Property("seatname", th.StringType),
+                        th.Property("seatcachedvisualx", th.NumberType),
+                        th.Property("seatcachedvisualy", th.NumberType),
+                        th.Property("tickettypename", th.StringType),
+                        th.Property("bundlevariant", th.StringType),
+                    )
+                ),
+            ),
+            th.Property("totalamount", th.NumberType),
+            th.Property("webskinid", th.IntegerType),
+            th.Property("createdts", th.DateTimeType),
+            th.Property("lastupdatets", th.DateTimeType),
+            th.Property("c_remark", th.StringType),
+            th.Property("c_podiumpascode", th.StringType),
+            th.Property("c_donatie", th.IntegerType),
+        ).to_dict()
+    )
+
+    @property
+    def nested_streams(self) -> List[NestedTicketmaticStream]:
+        """Return the selected streams of the tickets, payments, products and costs."""
+        return [child for child in self.child_streams if child.selected]
+
+    @property
+    def required_properties(self) -> Set[str]:
+        """Keep the properties with the records of the selected nested streams."""
+        return super().required_properties | {
+            child.parent_property for child in self.nested_streams
+        }
+
+    @cached_property
+    def pruned_nested_properties(self) -> Dict[str, Set[str]]:
+        """Nested properties that only the selected nested streams get.
+
+        The properties with the nested records are conformed whole, and the
+        properties that the catalog of the orders deselects are removed after the
+        nested records were emitted.
+        """
+        parents = {child.parent_property for child in self.nested_streams}
+        pruned: Dict[str, Set[str]] = {}
+        for path in deselected_paths(self.mask):
+            name, _, nested_name = path.partition(".")
+            if name in parents and nested_name and "." not in nested_name:
+                pruned.setdefault(name, set()).add(nested_name)
+        return pruned
+
+    def get_records(self, context: Optional[dict]) -> Iterable[dict]:
+        """Return the orders, after announcing the schemas of the nested streams."""
+        for child in self.nested_streams:
+            child._write_schema_message()
+
+        yield from super().get_records(context)
+
+    def get_batches(
+        self, batch_config: BatchConfig, context: Optional[dict] = None
+    ) -> Iterable[Tuple[BaseBatchFileEncoding, List[str]]]:
+        """Return the batches of orders, then emit the last nested batch files."""
+        yield from super().get_batches(batch_config, context)
+
+        for child in self.nested_streams:
+            child.flush_nested_records()
+
+    def post_process(self, row: dict, context: Optional[dict] = None) -> Optional[dict]:
+        """Emit the nested records of the order to their own streams."""
+        row = super().post_process(row, context)
+        if row is None:
+            return None
+
+        for child in self.nested_streams:
+            child.emit_nested_records(row)
+            if self.config.get("strip_nested_records"):
+                row.pop(child.parent_property, None)
+
+        for name, nested_names in self.pruned_nested_properties.items():
+            if row.get(name):
+                row[name] = [
+                    {
+                        key: value
+                        for key, value in item.items()
+                        if key not in nested_names
+                    }
+                    for item in row[name]
+                ]
+
+        return row
+
+    def generate_child_contexts(
+        self, record: dict, context: Optional[dict]
+    ) -> Iterable[Optional[dict]]:
+        """Return no contexts, the nested streams are emitted in post_process."""
+        return []
+
+
+class OrderTickets(NestedTicketmaticStream):
+    """The tickets of the orders."""
+
+    name = "order_tickets"
+    parent_stream_type = Orders
+    parent_property = "tickets"
+    primary_keys = ["id"]
+
+    schema = LazySchema(lambda: Orders.schema["properties"]["tickets"]["items"])
+
+
+class OrderPayments(NestedTicketmaticStream):
+    """The payments of the orders."""
+
+    name = "order_payments"
+    parent_stream_type = Orders
+    parent_property = "payments"
+    primary_keys = ["id"]
+
+    schema = LazySchema(lambda: Orders.schema["properties"]["payments"]["items"])
+
+
+class OrderProducts(NestedTicketmaticStream):
+    """The products of the orders."""
+
+    name = "order_products"
+    parent_stream_type = Orders
+    parent_property = "products"
+    primary_keys = ["id"]
+
+    schema = LazySchema(lambda: Orders.schema["properties"]["products"]["items"])
+
+
+class OrderCosts(NestedTicketmaticStream):
+    """The order costs of the orders."""
+
+    name = "order_costs"
+    parent_stream_type = Orders
+    parent_property = "ordercosts"
+    primary_keys = ["orderid", "servicechargedefinitionid"]
+
+    schema = LazySchema(lambda: Orders.schema["properties"]["ordercosts"]["items"])
 
 
 class Events(PaginatedTicketmaticStream):
@@ -137,300 +319,311 @@ class Events(PaginatedTicketmaticStream):
 
     name = "events"
     path = "/events"
+    filter_table = "tm.event"
     primary_keys = ["id"]
     replication_key = "lastupdatets"
 
-    schema = th.PropertiesList(
-        th.Property("c_ticketlayoutvariant", th.IntegerType),
-        th.Property("c_genre", th.ArrayType(th.IntegerType)),
-        th.Property("c_season", th.IntegerType),
-        th.Property("c_hasupsells", th.StringType),
-        th.Property("c_isupsellfor", th.NumberType),
-        th.Property("c_ypname", th.StringType),
-        th.Property("c_ypid", th.StringType),
-        th.Property("c_ypstartts", th.DateTimeType),
-        th.Property("c_ypendts", th.DateTimeType),
-        th.Property("c_yplocationid", th.IntegerType),
-        th.Property("c_yplocationname", th.StringType),
-        th.Property("c_ypupdatets", th.DateTimeType),
-        th.Property("c_ticketfee", th.BooleanType),
-        th.Property("c_oldid", th.StringType),
-        th.Property("c_ypaltid", th.StringType),
-        th.Property("c_extratickettext", th.StringType),
-        th.Property("c_noordercosts", th.BooleanType),
-        th.Property("c_pkiid", th.StringType),
-        th.Property("c_grootboekrekening", th.StringType),
-        th.Property("c_vismanetcode", th.StringType),
-        th.Property("c_apponly", th.BooleanType),
-        th.Property("c_sendtofriend", th.StringType),
-        th.Property("c_codedisplaybeforestart", th.StringType),
-        th.Property("c_btwcode", th.StringType),
-        th.Property("c_status", th.NumberType),
-        th.Property("c_retouroptions", th.ArrayType(th.IntegerType)),
-        th.Property("c_nohardtickets", th.BooleanType),
-        # Ticketmatic properties
-        th.Property("id", th.IntegerType),
-        th.Property("name", th.StringType),
-        th.Property("audiopreviewurl", th.StringType),
-        th.Property(
-            "availability",
-            th.ArrayType(
-                th.ObjectType(
-                    th.Property("complimentary", th.IntegerType),
-                    th.Property("free", th.IntegerType),
-                    th.Property("locked_hard", th.IntegerType),
-                    th.Property("locked_soft", th.IntegerType),
-                    th.Property("reserved", th.IntegerType),
-                    th.Property("sold_paid", th.IntegerType),
-                    th.Property("sold_unpaid", th.IntegerType),
-                    th.Property("tickettypeid", th.IntegerType),
-                    th.Property("total", th.IntegerType),
-                    th.Property("servicechargedefinitionid", th.DateTimeType),
-                )
+    schema = LazySchema(
+        lambda: th.PropertiesList(
+            th.Property("c_ticketlayoutvariant", th.IntegerType),
+            th.Property("c_genre", th.ArrayType(th.IntegerType)),
+            th.Property("c_season", th.IntegerType),
+            th.Property("c_hasupsells", th.StringType),
+            th.Property("c_isupsellfor", th.NumberType),
+            th.Property("c_ypname", th.StringType),
+            th.Property("c_ypid", th.StringType),
+            th.Property("c_ypstartts", th.DateTimeType),
+            th.Property("c_ypendts", th.DateTimeType),
+            th.Property("c_yplocationid", th.IntegerType),
+            th.Property("c_yplocationname", th.StringType),
+            th.Property("c_ypupdatets", th.DateTimeType),
+            th.Property("c_ticketfee", th.BooleanType),
+            th.Property("c_oldid", th.StringType),
+            th.Property("c_ypaltid", th.StringType),
+            th.Property("c_extratickettext", th.StringType),
+            th.Property("c_noordercosts", th.BooleanType),
+            th.Property("c_pkiid", th.StringType),
+            th.Property("c_grootboekrekening", th.StringType),
+            th.Property("c_vismanetcode", th.StringType),
+            th.Property("c_apponly", th.BooleanType),
+            th.Property("c_sendtofriend", th.StringType),
+            th.Property("c_codedisplaybeforestart", th.StringType),
+            th.Property("c_btwcode", th.StringType),
+            th.Property("c_status", th.NumberType),
+            th.Property("c_retouroptions", th.ArrayType(th.IntegerType)),
+            th.Property("c_nohardtickets", th.BooleanType),
+            # Ticketmatic properties
+            th.Property("id", th.IntegerType),
+            th.Property("name", th.StringType),
+            th.Property("audiopreviewurl", th.StringType),
+            th.Property(
+                "availability",
+                th.ArrayType(
+                    th.ObjectType(
+                        th.Property("complimentary", th.IntegerType),
+                        th.Property("free", th.IntegerType),
+                        th.Property("locked_hard", th.IntegerType),
+                        th.Property("locked_soft", th.IntegerType),
+                        th.Property("reserved", th.IntegerType),
+                        th.Property("sold_paid", th.IntegerType),
+                        th.Property("sold_unpaid", th.IntegerType),
+                        th.Property("tickettypeid", th.IntegerType),
+                        th.Property("total", th.IntegerType),
+                        th.Property("servicechargedefinitionid", th.DateTimeType),
+                    )
+                ),
             ),
-        ),
-        th.Property("code", th.StringType),
-        th.Property(
-            "contingents",
-            th.ArrayType(
-                th.ObjectType(
-                    th.Property("id", th.IntegerType),
-                    th.Property("name", th.StringType),
-                    th.Property("amount", th.IntegerType),
-                    th.Property("eventid", th.IntegerType),
-                    th.Property(
-                        "eventspecificprices",
-                        th.ObjectType(
-                            th.Property(
-                                "prices",
-                                th.ArrayType(
-                                    th.ObjectType(
-                                        th.Property("pricetypeid", th.IntegerType),
-                                        th.Property(
-                                            "availabilities",
-                                            th.ArrayType(th.BooleanType),
-                                        ),
-                                        th.Property(
-                                            "saleschannels",
-                                            th.ArrayType(th.IntegerType),
-                                        ),
-                                        # TODO: sometimes this returns [100,1000, null, null]. It seems to break on the nulls. Since th.NumberType cant change Nulls.
-                                        # th.Property("prices", th.ArrayType(th.NumberType))
-                                    )
+            th.Property("code", th.StringType),
+            th.Property(
+                "contingents",
+                th.ArrayType(
+                    th.ObjectType(
+                        th.Property("id", th.IntegerType),
+                        th.Property("name", th.StringType),
+                        th.Property("amount", th.IntegerType),
+                        th.Property("eventid", th.IntegerType),
+                        th.Property(
+                            "eventspecificprices",
+                            th.ObjectType(
+                                th.Property(
+                                    "prices",
+                                    th.ArrayType(
+                                        th.ObjectType(
+                                            th.Property("pricetypeid", th.IntegerType),
+                                            th.Property(
+                                                "availabilities",
+                                                th.ArrayType(th.BooleanType),
+                                            ),
+                                            th.Property(
+                                                "saleschannels",
+                                                th.ArrayType(th.IntegerType),
+                                            ),
+                                            # TODO: sometimes this returns [100,1000, null, null]. It seems to break on the nulls. Since th.NumberType cant change Nulls.
+                                            # th.Property("prices", th.ArrayType(th.NumberType))
+                                        )
+                                    ),
                                 ),
                             ),
                         ),
-                    ),
-                    th.Property(
-                        "locks",
-                        th.ArrayType(
-                            th.ObjectType(
-                                th.Property("tickettypeid", th.IntegerType),
-                                th.Property("locktypeid", th.IntegerType),
-                                th.Property("amount", th.IntegerType),
-                            )
+                        th.Property(
+                            "locks",
+                            th.ArrayType(
+                                th.ObjectType(
+                                    th.Property("tickettypeid", th.IntegerType),
+                                    th.Property("locktypeid", th.IntegerType),
+                                    th.Property("amount", th.IntegerType),
+                                )
+                            ),
                         ),
-                    ),
-                    th.Property("pricelistid", th.IntegerType),
-                    th.Property("withimportedbarcodes", th.BooleanType),
-                )
-            ),
-        ),
-        th.Property("currentstatus", th.IntegerType),
-        th.Property("description", th.StringType),
-        th.Property("endts", th.StringType),
-        th.Property("externalcode", th.StringType),
-        th.Property("image", th.StringType),
-        th.Property("info", th.StringType),
-        th.Property(
-            "layout",
-            th.ObjectType(
-                th.Property("color", th.StringType),
-                th.Property("maxImage", th.BooleanType),
+                        th.Property("pricelistid", th.IntegerType),
+                        th.Property("withimportedbarcodes", th.BooleanType),
+                    )
+                ),
             ),
-        ),
-        th.Property("locationid", th.IntegerType),
-        th.Property("locationname", th.StringType),
-        th.Property("maxnbrofticketsperbasket", th.IntegerType),
-        th.Property("optinsetid", th.IntegerType),
-        th.Property(
-            "previews",
-            th.ArrayType(
+            th.Property("currentstatus", th.IntegerType),
+            th.Property("description", th.StringType),
+            th.Property("endts", th.StringType),
+            th.Property("externalcode", th.StringType),
+            th.Property("image", th.StringType),
+            th.Property("info", th.StringType),
+            th.Property(
+                "layout",
                 th.ObjectType(
-                    th.Property("type", th.IntegerType),
-                    th.Property("url", th.StringType),
-                )
+                    th.Property("color", th.StringType),
+                    th.Property("maxImage", th.BooleanType),
+                ),
             ),
-        ),
-        th.Property(
-            "prices",
-            th.ObjectType(
-                th.Property(
-                    "contingents",
-                    th.ArrayType(
-                        th.ObjectType(
-                            th.Property("contingentid", th.IntegerType),
-                            th.Property(
-                                "pricetypes",
-                                th.ArrayType(
-                                    th.ObjectType(
-                                        th.Property("pricetypeid", th.IntegerType),
-                                        th.Property(
-                                            "saleschannels",
-                                            th.ArrayType(
-                                                th.ObjectType(
-                                                    th.Property(
-                                                        "tickettypepriceid",
-                                                        th.IntegerType,
-                                                    ),
-                                                    th.Property(
-                                                        "saleschannelid", th.IntegerType
-                                                    ),
-                                                    th.Property("price", th.NumberType),
-                                                    th.Property(
-                                                        "servicecharge", th.NumberType
-                                                    ),
-                                                    th.Property(
-                                                        "conditions",
-                                                        th.ArrayType(
-                                                            th.ObjectType(
-                                                                th.Property(
-                                                                    "type",
-                                                                    th.StringType,
-                                                                ),
-                                                                # TODO: dit kan een dicionary zijn met start / end, een array met integers of een integer lol
-                                                                # th.Property(
-                                                                #     "value",
-                                                                #     th.ObjectType(
-                                                                #         th.Property(
-                                                                #             "start",
-                                                                #             th.DateTimeType,
-                                                                #         ),
-                                                                #         th.Property(
-                                                                #             "end",
-                                                                #             th.DateTimeType,
-                                                                #         ),
-                                                                #     ),
-                                                                # ),
-                                                            )
+            th.Property("locationid", th.IntegerType),
+            th.Property("locationname", th.StringType),
+            th.Property("maxnbrofticketsperbasket", th.IntegerType),
+            th.Property("optinsetid", th.IntegerType),
+            th.Property(
+                "previews",
+                th.ArrayType(
+                    th.ObjectType(
+                        th.Property("type", th.IntegerType),
+                        th.Property("url", th.StringType),
+                    )
+                ),
+            ),
+            th.Property(
+                "prices",
+                th.ObjectType(
+                    th.Property(
+                        "contingents",
+                        th.ArrayType(
+                            th.ObjectType(
+                                th.Property("contingentid", th.IntegerType),
+                                th.Property(
+                                    "pricetypes",
+                                    th.ArrayType(
+                                        th.ObjectType(
+                                            th.Property("pricetypeid", th.IntegerType),
+                                            th.Property(
+                                                "saleschannels",
+                                                th.ArrayType(
+                                                    th.ObjectType(
+                                                        th.Property(
+                                                            "tickettypepriceid",
+                                                            th.IntegerType,
+                                                        ),
+                                                        th.Property(
+                                                            "saleschannelid",
+                                                            th.IntegerType,
+                                                        ),
+                                                        th.Property(
+                                                            "price", th.NumberType
+                                                        ),
+                                                        th.Property(
+                                                            "servicecharge",
+                                                            th.NumberType,
+                                                        ),
+                                                        th.Property(
+                                                            "conditions",
+                                                            th.ArrayType(
+                                                                th.ObjectType(
+                                                                    th.Property(
+                                                                        "type",
+                                                                        th.StringType,
+                                                                    ),
+                                                                    # TODO: dit kan een dicionary zijn met start / end, een array met integers of een integer lol
+                                                                    # th.Property(
+                                                                    #     "value",
+                                                                    #     th.ObjectType(
+                                                                    #         th.Property(
+                                                                    #             "start",
+                                                                    #             th.DateTimeType,
+                                                                    #         ),
+                                                                    #         th.Property(
+                                                                    #             "end",
+                                                                    #             th.DateTimeType,
+                                                                    #         ),
+                                                                    #     ),
+                                                                    # ),
+                                                                )
+                                                            ),
+                                                        ),
+                                                        # No idea what this array should include
+                                                        th.Property(
+                                                            "costs",
+                                                            th.ArrayType(th.StringType),
                                                         ),
-                                                    ),
-                                                    # No idea what this array should include
-                                                    th.Property(
-                                                        "costs",
-                                                        th.ArrayType(th.StringType),
-                                                    ),
-                                                )
+                                                    )
+                                                ),
+                                            ),
+                                            th.Property("price", th.NumberType),
+                                            th.Property(
+                                                "tickettypepriceid", th.IntegerType
                                             ),
-                                        ),
-                                        th.Property("price", th.NumberType),
-                                        th.Property(
-                                            "tickettypepriceid", th.IntegerType
                                         ),
                                     ),
                                 ),
-                            ),
-                        )
+                            )
+                        ),
                     ),
                 ),
             ),
-        ),
-        th.Property("productionid", th.IntegerType),
-        th.Property("publishedts", th.DateTimeType),
-        th.Property("queuetoken", th.IntegerType),
-        th.Property("revenuesplitid", th.IntegerType),
-        th.Property("saleendts", th.DateTimeType),
-        th.Property(
-            "saleschannels",
-            th.ArrayType(
-                th.ObjectType(
-                    th.Property("eventid", th.IntegerType),
-                    th.Property("haswaitinglist", th.BooleanType),
-                    th.Property("isactive", th.BooleanType),
-                    th.Property("saleendts", th.DateTimeType),
-                    th.Property("saleschannelid", th.IntegerType),
-                    th.Property("salestartts", th.StringType),
-                )
+            th.Property("productionid", th.IntegerType),
+            th.Property("publishedts", th.DateTimeType),
+            th.Property("queuetoken", th.IntegerType),
+            th.Property("revenuesplitid", th.IntegerType),
+            th.Property("saleendts", th.DateTimeType),
+            th.Property(
+                "saleschannels",
+                th.ArrayType(
+                    th.ObjectType(
+                        th.Property("eventid", th.IntegerType),
+                        th.Property("haswaitinglist", th.BooleanType),
+                        th.Property("isactive", th.BooleanType),
+                        th.Property("saleendts", th.DateTimeType),
+                        th.Property("saleschannelid", th.IntegerType),
+                        th.Property("salestartts", th.StringType),
+                    )
+                ),
             ),
-        ),
-        th.Property("salestartts", th.DateTimeType),
-        th.Property("salestatusmessagesid", th.IntegerType),
-        th.Property("schedule", th.StringType),
-        th.Property("seatallowsingle", th.BooleanType),
-        th.Property("seated_chartkey", th.StringType),
-        th.Property(
-            "seated_contingents",
-            th.ArrayType(
-                th.ObjectType(
-                    th.Property("id", th.IntegerType),
-                    th.Property("name", th.StringType),
-                    th.Property("amount", th.IntegerType),
-                    th.Property("eventid", th.IntegerType),
-                    # No idea what to expect
-                    th.Property("eventspecificprices", th.ObjectType()),
-                    th.Property("locks", th.ArrayType(th.StringType)),
-                    th.Property("pricelistid", th.IntegerType),
-                    th.Property("withimportedbarcodes", th.BooleanType),
-                )
+            th.Property("salestartts", th.DateTimeType),
+            th.Property("salestatusmessagesid", th.IntegerType),
+            th.Property("schedule", th.StringType),
+            th.Property("seatallowsingle", th.BooleanType),
+            th.Property("seated_chartkey", th.StringType),
+            th.Property(
+                "seated_contingents",
+                th.ArrayType(
+                    th.ObjectType(
+                        th.Property("id", th.IntegerType),
+                        th.Property("name", th.StringType),
+                        th.Property("amount", th.IntegerType),
+                        th.Property("eventid", th.IntegerType),
+                        # No idea what to expect
+                        th.Property("eventspecificprices", th.ObjectType()),
+                        th.Property("locks", th.ArrayType(th.StringType)),
+                        th.Property("pricelistid", th.IntegerType),
+                        th.Property("withimportedbarcodes", th.BooleanType),
+                    )
+                ),
             ),
-        ),
-        th.Property(
-            "seatingplancontingents",
-            th.ArrayType(
-                th.ObjectType(
-                    th.Property("id", th.IntegerType),
-                    th.Property("name", th.StringType),
-                    th.Property("amount", th.IntegerType),
-                    th.Property("eventid", th.IntegerType),
-                    th.Property("seatrankid", th.IntegerType),
-                )
+            th.Property(
+                "seatingplancontingents",
+                th.ArrayType(
+                    th.ObjectType(
+                        th.Property("id", th.IntegerType),
+                        th.Property("name", th.StringType),
+                        th.Property("amount", th.IntegerType),
+                        th.Property("eventid", th.IntegerType),
+                        th.Property("seatrankid", th.IntegerType),
+                    )
+                ),
             ),
-        ),
-        th.Property(
-            "seatingplaneventspecificprices",
-            th.ObjectType(
-                th.Property(
-                    "prices",
-                    th.ArrayType(
-                        th.ObjectType(
-                            th.Property("saleschannels", th.ArrayType(th.IntegerType)),
-                            # th.Property("prices", th.ArrayType(th.NumberType)),
-                            th.Property("availabilities", th.ArrayType(th.BooleanType)),
-                            th.Property("pricetypeid", th.IntegerType),
+            th.Property(
+                "seatingplaneventspecificprices",
+                th.ObjectType(
+                    th.Property(
+                        "prices",
+                        th.ArrayType(
+                            th.ObjectType(
+                                th.Property(
+                                    "saleschannels", th.ArrayType(th.IntegerType)
+                                ),
+                                # th.Property("prices", th.ArrayType(th.NumberType)),
+                                th.Property(
+                                    "availabilities", th.ArrayType(th.BooleanType)
+                                ),
+                                th.Property("pricetypeid", th.IntegerType),
+                            ),
                         ),
                     ),
+                    th.Property("seatrankids", th.ArrayType(th.IntegerType)),
                 ),
-                th.Property("seatrankids", th.ArrayType(th.IntegerType)),
             ),
-        ),
-        th.Property("seatingplanid", th.IntegerType),
-        th.Property("seatingplanpricelistid", th.IntegerType),
-        th.Property("seatselection", th.BooleanType),
-        th.Property("segmentationtags", th.ArrayType(th.StringType)),
-        th.Property("servicemailids", th.ArrayType(th.IntegerType)),
-        th.Property("shortdescription", th.StringType),
-        th.Property("socialdistance", th.IntegerType),
-        th.Property("startts", th.DateTimeType),
-        th.Property("subtitle", th.StringType),
-        th.Property("subtitle2", th.StringType),
-        th.Property("tags", th.ArrayType(th.StringType)),
-        th.Property("ticketfeeid", th.IntegerType),
-        th.Property("ticketinfoid", th.IntegerType),
-        th.Property("ticketlayoutid", th.IntegerType),
-        th.Property("totalmaxtickets", th.IntegerType),
-        th.Property(
-            "translations",
-            th.ObjectType(
-                th.Property("nameen", th.StringType),
-                th.Property("namefr", th.StringType),
+            th.Property("seatingplanid", th.IntegerType),
+            th.Property("seatingplanpricelistid", th.IntegerType),
+            th.Property("seatselection", th.BooleanType),
+            th.Property("segmentationtags", th.ArrayType(th.StringType)),
+            th.Property("servicemailids", th.ArrayType(th.IntegerType)),
+            th.Property("shortdescription", th.StringType),
+            th.Property("socialdistance", th.IntegerType),
+            th.Property("startts", th.DateTimeType),
+            th.Property("subtitle", th.StringType),
+            th.Property("subtitle2", th.StringType),
+            th.Property("tags", th.ArrayType(th.StringType)),
+            th.Property("ticketfeeid", th.IntegerType),
+            th.Property("ticketinfoid", th.IntegerType),
+            th.Property("ticketlayoutid", th.IntegerType),
+            th.Property("totalmaxtickets", th.IntegerType),
+            th.Property(
+                "translations",
+                th.ObjectType(
+                    th.Property("nameen", th.StringType),
+                    th.Property("namefr", th.StringType),
+                ),
             ),
-        ),
-        th.Property("upsellid", th.IntegerType),
-        th.Property("waitinglisttype", th.IntegerType),
-        th.Property("webremark", th.StringType),
-        th.Property("createdts", th.DateTimeType),
-        th.Property("lastupdatets", th.DateTimeType),
-    ).to_dict()
+            th.Property("upsellid", th.IntegerType),
+            th.Property("waitinglisttype", th.IntegerType),
+            th.Property("webremark", th.StringType),
+            th.Property("createdts", th.DateTimeType),
+            th.Property("lastupdatets", th.DateTimeType),
+        ).to_dict()
+    )
 
 
 class Contacts(PaginatedTicketmaticStream):
@@ -438,74 +631,77 @@ class Contacts(PaginatedTicketmaticStream):
 
     name = "contacts"
     path = "/contacts"
+    filter_table = "tm.contact"
     primary_keys = ["id"]
     replication_key = "lastupdatets"
 
-    schema = th.PropertiesList(
-        th.Property("id", th.IntegerType),
-        th.Property("createdts", th.DateTimeType),
-        th.Property("lastupdatets", th.DateTimeType),
-        th.Property("isdeleted", th.BooleanType),
-        th.Property("sendmail", th.BooleanType),
-        th.Property("customertitleid", th.IntegerType),
-        th.Property("firstname", th.StringType),
-        th.Property("middlename", th.StringType),
-        th.Property("lastname", th.StringType),
-        th.Property("email", th.StringType),
-        th.Property("languagecode", th.StringType),
-        th.Property("birthdate", th.StringType),
-        th.Property("company", th.StringType),
-        th.Property("sex", th.StringType),
-        th.Property("c_accountnumber", th.StringType),
-        th.Property("c_oldid", th.StringType),
-        th.Property("c_emailings", th.ArrayType(th.IntegerType)),
-        th.Property("c_emailingpreference", th.ArrayType(th.IntegerType)),
-        th.Property(
-            "addresses",
-            th.ArrayType(
-                th.ObjectType(
-                    th.Property("customerid", th.IntegerType),
-                    th.Property("id", th.IntegerType),
-                    th.Property("typeid", th.IntegerType),
-                    th.Property("type", th.StringType),
-                    th.Property("street1", th.StringType),
-                    th.Property("street2", th.StringType),
-                    th.Property("street3", th.StringType),
-                    th.Property("zip", th.StringType),
-                    th.Property("city", th.StringType),
-                    th.Property("state", th.StringType),
-                    th.Property("countrycode", th.StringType),
-                    th.Property("country", th.StringType),
-                )
+    schema = LazySchema(
+        lambda: th.PropertiesList(
+            th.Property("id", th.IntegerType),
+            th.Property("createdts", th.DateTimeType),
+            th.Property("lastupdatets", th.DateTimeType),
+            th.Property("isdeleted", th.BooleanType),
+            th.Property("sendmail", th.BooleanType),
+            th.Property("customertitleid", th.IntegerType),
+            th.Property("firstname", th.StringType),
+            th.Property("middlename", th.StringType),
+            th.Property("lastname", th.StringType),
+            th.Property("email", th.StringType),
+            th.Property("languagecode", th.StringType),
+            th.Property("birthdate", th.StringType),
+            th.Property("company", th.StringType),
+            th.Property("sex", th.StringType),
+            th.Property("c_accountnumber", th.StringType),
+            th.Property("c_oldid", th.StringType),
+            th.Property("c_emailings", th.ArrayType(th.IntegerType)),
+            th.Property("c_emailingpreference", th.ArrayType(th.IntegerType)),
+            th.Property(
+                "addresses",
+                th.ArrayType(
+                    th.ObjectType(
+                        th.Property("customerid", th.IntegerType),
+                        th.Property("id", th.IntegerType),
+                        th.Property("typeid", th.IntegerType),
+                        th.Property("type", th.StringType),
+                        th.Property("street1", th.StringType),
+                        th.Property("street2", th.StringType),
+                        th.Property("street3", th.StringType),
+                        th.Property("zip", th.StringType),
+                        th.Property("city", th.StringType),
+                        th.Property("state", th.StringType),
+                        th.Property("countrycode", th.StringType),
+                        th.Property("country", th.StringType),
+                    )
+                ),
             ),
-        ),
-        th.Property(
-            "phonenumbers",
-            th.ArrayType(
-                th.ObjectType(
-                    th.Property("customerid", th.IntegerType),
-                    th.Property("id", th.IntegerType),
-                    th.Property("typeid", th.IntegerType),
-                    th.Property("type", th.StringType),
-                    th.Property("number", th.StringType),
-                )
+            th.Property(
+                "phonenumbers",
+                th.ArrayType(
+                    th.ObjectType(
+                        th.Property("customerid", th.IntegerType),
+                        th.Property("id", th.IntegerType),
+                        th.Property("typeid", th.IntegerType),
+                        th.Property("type", th.StringType),
+                        th.Property("number", th.StringType),
+                    )
+                ),
             ),
-        ),
-        th.Property("relationtypes", th.ArrayType(th.IntegerType)),
-        th.Property("subscribed", th.BooleanType),
-        th.Property(
-            "relationships",
-            th.ArrayType(
-                th.ObjectType(
-                    th.Property("id", th.IntegerType),
-                    th.Property("typeid", th.IntegerType),
-                    th.Property("childcontactid", th.IntegerType),
-                    th.Property("parentcontactid", th.IntegerType),
-                )
+            th.Property("relationtypes", th.ArrayType(th.IntegerType)),
+            th.Property("subscribed", th.BooleanType),
+            th.Property(
+                "relationships",
+                th.ArrayType(
+                    th.ObjectType(
+                        th.Property("id", th.IntegerType),
+                        th.Property("typeid", th.IntegerType),
+                        th.Property("childcontactid", th.IntegerType),
+                        th.Property("parentcontactid", th.IntegerType),
+                    )
+                ),
             ),
-        ),
-        th.Property("status", th.StringType),
-    ).to_dict()
+            th.Property("status", th.StringType),
+        ).to_dict()
+    )
 
     def get_url_params(
         self,
@@ -516,16 +712,17 @@ class Contacts(PaginatedTicketmaticStream):
         start_date = self.get_starting_timestamp(context)
 
         params = {
-            "limit": self.limit_per_request,
+            "limit": self.get_page_size(context),
             "offset": next_page_token,
             "lastupdatesince": start_date,
             "includearchived": "true",
         }
+        params.update(self.get_range_params(context, next_page_token))
 
         return params
 
 
-class PriceTypes(TicketmaticStream):
+class PriceTypes(SettingsTicketmaticStream):
     """
     The original/custom pricing types.
     """
@@ -533,19 +730,22 @@ class PriceTypes(TicketmaticStream):
     name = "price_types"
     path = "/settings/pricing/pricetypes"
     primary_keys = ["id"]
+    replication_key = "lastupdatets"
 
-    schema = th.PropertiesList(
-        th.Property("id", th.IntegerType),
-        th.Property("typeid", th.IntegerType),
-        th.Property("name", th.StringType),
-        th.Property("remark", th.StringType),
-        th.Property("isarchived", th.BooleanType),
-        th.Property("createdts", th.DateTimeType),
-        th.Property("lastupdatets", th.DateTimeType),
-    ).to_dict()
+    schema = LazySchema(
+        lambda: th.PropertiesList(
+            th.Property("id", th.IntegerType),
+            th.Property("typeid", th.IntegerType),
+            th.Property("name", th.StringType),
+            th.Property("remark", th.StringType),
+            th.Property("isarchived", th.BooleanType),
+            th.Property("createdts", th.DateTimeType),
+            th.Property("lastupdatets", th.DateTimeType),
+        ).to_dict()
+    )
 
 
-class SeatRanks(TicketmaticStream):
+class SeatRanks(SettingsTicketmaticStream):
     """
     The original/custom seat ranks.
     """
@@ -553,18 +753,21 @@ class SeatRanks(TicketmaticStream):
     name = "seat_ranks"
     path = "/settings/seatingplans/seatranks"
     primary_keys = ["id"]
+    replication_key = "lastupdatets"
 
-    schema = th.PropertiesList(
-        th.Property("id", th.IntegerType),
-        th.Property("name", th.StringType),
-        th.Property("color", th.StringType),
-        th.Property("isarchived", th.BooleanType),
-        th.Property("createdts", th.DateTimeType),
-        th.Property("lastupdatets", th.DateTimeType),
-    ).to_dict()
+    schema = LazySchema(
+        lambda: th.PropertiesList(
+            th.Property("id", th.IntegerType),
+            th.Property("name", th.StringType),
+            th.Property("color", th.StringType),
+            th.Property("isarchived", th.BooleanType),
+            th.Property("createdts", th.DateTimeType),
+            th.Property("lastupdatets", th.DateTimeType),
+        ).to_dict()
+    )
 
 
-class EventLocations(TicketmaticStream):
+class EventLocations(SettingsTicketmaticStream):
     """
     The event locations.
     """
@@ -572,26 +775,29 @@ class EventLocations(TicketmaticStream):
     name = "event_locations"
     path = "/settings/events/eventlocations"
     primary_keys = ["id"]
+    replication_key = "lastupdatets"
 
-    schema = th.PropertiesList(
-        th.Property("id", th.IntegerType),
-        th.Property("name", th.StringType),
-        th.Property("street1", th.StringType),
-        th.Property("street2", th.StringType),
-        th.Property("street3", th.StringType),
-        th.Property("street4", th.StringType),
-        th.Property("zip", th.BooleanType),
-        th.Property("city", th.StringType),
-        th.Property("state", th.StringType),
-        th.Property("countrycode", th.StringType),
-        th.Property("info", th.StringType),
-        th.Property("createdts", th.DateTimeType),
-        th.Property("lastupdatets", th.DateTimeType),
-        th.Property("isarchived", th.BooleanType),
-    ).to_dict()
-
-
-class RelationTypes(TicketmaticStream):
+    schema = LazySchema(
+        lambda: th.PropertiesList(
+            th.Property("id", th.IntegerType),
+            th.Property("name", th.StringType),
+            th.Property("street1", th.StringType),
+            th.Property("street2", th.StringType),
+            th.Property("street3", th.StringType),
+            th.Property("street4", th.StringType),
+            th.Property("zip", th.BooleanType),
+            th.Property("city", th.StringType),
+            th.Property("state", th.StringType),
+            th.Property("countrycode", th.StringType),
+            th.Property("info", th.StringType),
+            th.Property("createdts", th.DateTimeType),
+            th.Property("lastupdatets", th.DateTimeType),
+            th.Property("isarchived", th.BooleanType),
+        ).to_dict()
+    )
+
+
+class RelationTypes(SettingsTicketmaticStream):
     """
     The relation types.
     """
@@ -599,17 +805,20 @@ class RelationTypes(TicketmaticStream):
     name = "relation_types"
     path = "/settings/system/relationtypes"
     primary_keys = ["id"]
+    replication_key = "lastupdatets"
 
-    schema = th.PropertiesList(
-        th.Property("id", th.IntegerType),
-        th.Property("name", th.StringType),
-        th.Property("createdts", th.DateTimeType),
-        th.Property("lastupdatets", th.DateTimeType),
-        th.Property("isarchived", th.BooleanType),
-    ).to_dict()
+    schema = LazySchema(
+        lambda: th.PropertiesList(
+            th.Property("id", th.IntegerType),
+            th.Property("name", th.StringType),
+            th.Property("createdts", th.DateTimeType),
+            th.Property("lastupdatets", th.DateTimeType),
+            th.Property("isarchived", th.BooleanType),
+        ).to_dict()
+    )
 
 
-class PaymentMethods(TicketmaticStream):
+class PaymentMethods(SettingsTicketmaticStream):
     """
     The payment methods.
     """
@@ -617,21 +826,24 @@ class PaymentMethods(TicketmaticStream):
     name = "payment_methods"
     path = "/settings/ticketsales/paymentmethods"
     primary_keys = ["id"]
+    replication_key = "lastupdatets"
 
-    schema = th.PropertiesList(
-        th.Property("id", th.IntegerType),
-        th.Property("name", th.StringType),
-        th.Property("internalremark", th.StringType),
-        th.Property("paymentmethodtypeid", th.IntegerType),
-        th.Property("c_grootboekrekening", th.StringType),
-        th.Property("c_vismanetcode", th.StringType),
-        th.Property("createdts", th.DateTimeType),
-        th.Property("lastupdatets", th.DateTimeType),
-        th.Property("isarchived", th.BooleanType),
-    ).to_dict()
-
-
-class PaymentScenarios(TicketmaticStream):
+    schema = LazySchema(
+        lambda: th.PropertiesList(
+            th.Property("id", th.IntegerType),
+            th.Property("name", th.StringType),
+            th.Property("internalremark", th.StringType),
+            th.Property("paymentmethodtypeid", th.IntegerType),
+            th.Property("c_grootboekrekening", th.StringType),
+            th.Property("c_vismanetcode", th.StringType),
+            th.Property("createdts", th.DateTimeType),
+            th.Property("lastupdatets", th.DateTimeType),
+            th.Property("isarchived", th.BooleanType),
+        ).to_dict()
+    )
+
+
+class PaymentScenarios(SettingsTicketmaticStream):
     """
     A payment scenario defines how a customer will pay for an order.
     This is not necessarily linked to a specific payment method.
@@ -640,10 +852,13 @@ class PaymentScenarios(TicketmaticStream):
     name = "payment_scenarios"
     path = "/settings/ticketsales/paymentscenarios"
     primary_keys = ["id"]
+    replication_key = "lastupdatets"
 
-    schema = th.PropertiesList(
-        th.Property("id", th.IntegerType),
-        th.Property("name", th.StringType),
-        th.Property("lastupdatets", th.DateTimeType),
-        th.Property("isarchived", th.BooleanType),
-    ).to_dict()
+    schema = LazySchema(
+        lambda: th.PropertiesList(
+            th.Property("id", th.IntegerType),
+            th.Property("name", th.StringType),
+            th.Property("lastupdatets", th.DateTimeType),
+            th.Property("isarchived", th.BooleanType),
+        ).to_dict()
+    )
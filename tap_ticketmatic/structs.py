@@ -0,0 +1,109 @@
+"""Compact typed records, generated from the stream schemas with msgspec.
+
+A decoded record is a dict per object, which takes about a kilobyte for an order
+ticket with two dozen properties. The structs generated here store the values
+in slots instead, so a decoded page takes several times less memory. Records
+are converted back to dicts when they are post-processed, right before they
+are emitted.
+"""
+
+from typing import Any, FrozenSet, List, Optional, Union
+
+from tap_ticketmatic.schema import schema_types
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Python types of the JSON types whose values are decoded as they are.
+SCALAR_TYPES = {
+    "integer": int,
+    "number": Union[int, float],
+    "string": str,
+}
+
+
+if msgspec is not None:
+
+    class Record(msgspec.Struct, gc=False):
+        """Base of the generated structs, with the item access of a dict.
+
+        Properties that were absent in the response are UNSET, and are left out
+        when the record is converted to a dict.
+        """
+
+        def __getitem__(self, key: str) -> Any:
+            return getattr(self, key)
+
+        def get(self, key: str, default: Any = None) -> Any:
+            value = getattr(self, key, msgspec.UNSET)
+            return default if value is msgspec.UNSET else value
+
+
+def field_type(schema: dict, name: str, deselected: FrozenSet[str], path: str) -> Any:
+    """Return the Python type of the values of a property, without None."""
+    types = [type_ for type_ in schema_types(schema) if type_ != "null"]
+    if types == ["object"] and "properties" in schema:
+        return struct_type(schema, name, deselected, f"{path}.")
+    if types == ["array"] and isinstance(schema.get("items"), dict):
+        item_type = field_type(schema["items"], name, deselected, path)
+        return List[Optional[item_type]]
+    if types == ["boolean"]:
+        # Numbers are accepted for booleans, like the conformer of the schema does.
+        return bool
+    if len(types) == 1 and types[0] in SCALAR_TYPES:
+        return SCALAR_TYPES[types[0]]
+
+    return Any
+
+
+def struct_type(
+    schema: dict, name: str, deselected: FrozenSet[str] = frozenset(), path: str = ""
+) -> type:
+    """Return a struct with the properties of an object schema.
+
+    Properties whose dotted path is in `deselected` are left out, so they are
+    skipped when a response is decoded.
+    """
+    fields = [
+        (
+            key,
+            Union[
+                msgspec.UnsetType,
+                Optional[field_type(subschema, key, deselected, f"{path}{key}")],
+            ],
+            msgspec.UNSET,
+        )
+        for key, subschema in schema["properties"].items()
+        if f"{path}{key}" not in deselected
+    ]
+    return msgspec.defstruct(name, fields, bases=(Record,), gc=False)
+
+
+def page_decoder(
+    schema: dict, name: str, deselected: FrozenSet[str] = frozenset()
+) -> "msgspec.json.Decoder":
+    """Return a decoder of pages with the records of the schema in `data`.
+
+    Properties that are not in the schema are skipped. Values that do not match
+    the schema raise a `msgspec.ValidationError`, except numbers for booleans
+    and numeric strings for numbers, which are converted.
+    """
+    if msgspec is None:
+        raise ImportError(
+            "Typed records require msgspec, install tap-ticketmatic[msgspec]."
+        )
+
+    page = msgspec.defstruct(
+        f"{name}_page",
+        [("data", List[struct_type(schema, name, deselected)], [])],
+        bases=(Record,),
+        gc=False,
+    )
+    return msgspec.json.Decoder(page, strict=False)
+
+
+def to_dict(record: Any) -> dict:
+    """Convert a struct to a dict of JSON values, without the unset properties."""
+    return msgspec.to_builtins(record)
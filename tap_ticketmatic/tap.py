@@ -1,11 +1,30 @@
 """ticketmatic tap class."""
 
-from typing import List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, List
 
+import requests
+from requests.adapters import HTTPAdapter
 from singer_sdk import Stream, Tap
 from singer_sdk import typing as th  # JSON schema typing helpers
+from singer_sdk._singerlib import Message, StateMessage
+from singer_sdk.helpers._state import get_writeable_state_dict
+from tap_ticketmatic.client import (
+    NestedTicketmaticStream,
+    PaginatedTicketmaticStream,
+)
+from tap_ticketmatic.encoding import JSONBackend, get_backend
+from tap_ticketmatic.instrumentation import Instrumentation
+from tap_ticketmatic.ratelimit import RateLimiter
 from tap_ticketmatic.streams import (
     Orders,
+    OrderTickets,
+    OrderPayments,
+    OrderProducts,
+    OrderCosts,
     Events,
     Contacts,
     PriceTypes,
@@ -18,6 +37,10 @@ from tap_ticketmatic.streams import (
 
 STREAM_TYPES = [
     Orders,
+    OrderTickets,
+    OrderPayments,
+    OrderProducts,
+    OrderCosts,
     Events,
     Contacts,
     PriceTypes,
@@ -38,25 +61,474 @@ class Tapticketmatic(Tap):
         th.Property(
             "accountname",
             th.StringType,
-            required=True,
         ),
         th.Property(
             "api_key",
             th.StringType,
-            required=True,
         ),
         th.Property(
             "api_secret",
             th.StringType,
-            required=True,
+        ),
+        th.Property(
+            "accounts",
+            th.ArrayType(
+                th.ObjectType(
+                    th.Property("accountname", th.StringType, required=True),
+                    th.Property("api_key", th.StringType, required=True),
+                    th.Property("api_secret", th.StringType, required=True),
+                )
+            ),
+            description=(
+                "Accounts to sync instead of the single `accountname`. Records get "
+                "an `accountname` property and every account has its own bookmarks. "
+                "Accounts are synced concurrently when `concurrent_streams` is set."
+            ),
+        ),
+        th.Property(
+            "api_url",
+            th.StringType,
+            default="https://apps.ticketmatic.com/api/1",
+            description="Root of the Ticketmatic API, without the account name.",
         ),
         th.Property(
             "start_date",
             th.StringType,
             default="2022-10-01",
         ),
+        th.Property(
+            "stream_records",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Parse records of paginated streams while the response is being "
+                "downloaded, so memory depends on the size of a record instead of "
+                "a page. With `concurrent_pages`, the prefetched pages are "
+                "downloaded whole and their records decoded one at a time. "
+                "Requires the `streaming` extra."
+            ),
+        ),
+        th.Property(
+            "typed_records",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Decode the pages of the paginated streams into compact structs "
+                "generated from the stream schemas, which take several times less "
+                "memory than dicts. Requires the `msgspec` extra."
+            ),
+        ),
+        th.Property(
+            "json_backend",
+            th.StringType,
+            default="auto",
+            allowed_values=["auto", "orjson", "msgspec", "json"],
+            description=(
+                "Library that decodes the responses and encodes the Singer "
+                "messages. `auto` uses msgspec when installed, with the `msgspec` "
+                "extra, and the standard library otherwise. Both keep amounts as "
+                "Decimals. `orjson` decodes them as floats."
+            ),
+        ),
+        th.Property(
+            "concurrent_pages",
+            th.IntegerType,
+            default=1,
+            description=(
+                "Number of pages of the paginated streams that are fetched "
+                "concurrently. Records are still emitted in order."
+            ),
+        ),
+        th.Property(
+            "keyset_pagination",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Page through the orders, events and contacts streams by their "
+                "`lastupdatets` cursor instead of by offset. Cannot be combined "
+                "with `concurrent_pages`."
+            ),
+        ),
+        th.Property(
+            "export_streams",
+            th.ArrayType(th.StringType),
+            default=[],
+            description=(
+                "Streams that are extracted with a few streamed queries on the "
+                "queries/export endpoint instead of page by page. Supports "
+                "`orders`, with its tickets and payments."
+            ),
+        ),
+        th.Property(
+            "strip_nested_records",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Remove the tickets, payments, products and order costs from the "
+                "orders when their own streams are selected."
+            ),
+        ),
+        th.Property(
+            "adaptive_page_size",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Adapt the page size of the orders, events and contacts streams to "
+                "the observed response time, size and errors. Every account and time "
+                "window adapts its own page size, and the last learned one is stored "
+                "in the state. Cannot be combined with `concurrent_pages`."
+            ),
+        ),
+        th.Property(
+            "min_page_size",
+            th.IntegerType,
+            default=100,
+            description="Smallest page size when `adaptive_page_size` is enabled.",
+        ),
+        th.Property(
+            "max_page_size",
+            th.IntegerType,
+            default=5000,
+            description="Largest page size when `adaptive_page_size` is enabled.",
+        ),
+        th.Property(
+            "target_page_seconds",
+            th.NumberType,
+            default=10,
+            description=(
+                "Response time above which the adaptive page size shrinks. It grows "
+                "while full pages take less than half of this time."
+            ),
+        ),
+        th.Property(
+            "max_page_bytes",
+            th.IntegerType,
+            default=50 * 1024 * 1024,
+            description="Response size above which the adaptive page size shrinks.",
+        ),
+        th.Property(
+            "window_months",
+            th.IntegerType,
+            default=0,
+            description=(
+                "Split the orders, events and contacts streams in time windows of "
+                "this many months, each with its own bookmark. Windows are synced "
+                "concurrently when `concurrent_streams` is set. Windows that end "
+                "before the bookmark of a sync without windows are skipped. 0 "
+                "disables windows."
+            ),
+        ),
+        th.Property(
+            "checkpoint_pages",
+            th.IntegerType,
+            default=0,
+            description=(
+                "Store a checkpoint of the orders, events and contacts scans in the "
+                "state every this many pages, so an interrupted sync continues at "
+                "the checkpoint instead of fetching the emitted pages again. "
+                "0 disables checkpoints."
+            ),
+        ),
+        th.Property(
+            "concurrent_streams",
+            th.IntegerType,
+            default=1,
+            description="Number of streams that are synced concurrently.",
+        ),
+        th.Property(
+            "cache_dir",
+            th.StringType,
+            description=(
+                "Directory of the files that `skip_unchanged_settings`, "
+                "`skip_unchanged_records` and `track_deleted_records` keep between "
+                "runs."
+            ),
+        ),
+        th.Property(
+            "skip_unchanged_settings",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Keep hashes of the emitted settings records and the ETags of their "
+                "responses in `cache_dir`, and only emit new or changed settings "
+                "records."
+            ),
+        ),
+        th.Property(
+            "cache_ttl",
+            th.IntegerType,
+            default=7 * 24 * 3600,
+            description=(
+                "Number of seconds after which a cached settings record is emitted "
+                "again, even if it did not change."
+            ),
+        ),
+        th.Property(
+            "skip_unchanged_records",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Keep fingerprints of the emitted orders, events and contacts in "
+                "`cache_dir` and skip records whose properties in the schema did "
+                "not change since they were last emitted."
+            ),
+        ),
+        th.Property(
+            "track_deleted_records",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Keep the ids of the emitted orders, events and contacts in "
+                "`cache_dir`, and list the ids that Ticketmatic still has after "
+                "every sync. Records that were deleted or archived are emitted "
+                "again with only their primary key and `_sdc_deleted_at`."
+            ),
+        ),
+        th.Property(
+            "validation_sample_rate",
+            th.NumberType,
+            default=0,
+            description=(
+                "Fraction of the records, between 0 and 1, that is validated against "
+                "the schema. Records that do not match are logged."
+            ),
+        ),
+        th.Property(
+            "pool_size",
+            th.IntegerType,
+            description=(
+                "Maximum number of kept-alive connections to Ticketmatic. Defaults "
+                "to the number of concurrent requests, with a minimum of 10."
+            ),
+        ),
+        th.Property(
+            "requests_per_second",
+            th.NumberType,
+            description=(
+                "Maximum number of requests per second to each Ticketmatic account, "
+                "shared by all streams and concurrent pages. Unlimited when not set."
+            ),
+        ),
+        th.Property(
+            "rate_limit_burst",
+            th.IntegerType,
+            default=1,
+            description=(
+                "Number of requests that may be sent at once after a quiet period "
+                "when `requests_per_second` is set."
+            ),
+        ),
+        th.Property(
+            "metrics_file",
+            th.StringType,
+            description=(
+                "File to which the request, parse, validation and emit timings and "
+                "counters of every stream are written at the end of the run, for "
+                "the textfile collector of the Prometheus node exporter."
+            ),
+        ),
+        th.Property(
+            "metrics_format",
+            th.StringType,
+            default="prometheus",
+            allowed_values=["prometheus", "openmetrics"],
+            description="Text format of the `metrics_file`.",
+        ),
     ).to_dict()
+    config_jsonschema["anyOf"] = [
+        {"required": ["accountname", "api_key", "api_secret"]},
+        {"required": ["accounts"]},
+    ]
+
+    # Guards stdout and the shared state when streams are synced concurrently.
+    lock = threading.RLock()
+
+    @cached_property
+    def requests_session(self) -> requests.Session:
+        """Return the session that all streams share to reuse their connections."""
+        concurrent_requests = self.config.get(
+            "concurrent_streams", 1
+        ) * self.config.get("concurrent_pages", 1)
+        pool_size = self.config.get("pool_size") or max(10, concurrent_requests)
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(
+            {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+        )
+
+        # Bodies are read by the streams, incrementally when records are streamed.
+        session.stream = self.config.get("stream_records", False)
+
+        return session
+
+    @cached_property
+    def accounts(self) -> Dict[str, dict]:
+        """Return the accounts to sync, with their credentials, by account name."""
+        accounts = self.config.get("accounts") or [
+            {
+                "accountname": self.config["accountname"],
+                "api_key": self.config["api_key"],
+                "api_secret": self.config["api_secret"],
+            }
+        ]
+        return {account["accountname"]: account for account in accounts}
+
+    @cached_property
+    def instrumentation(self) -> Instrumentation:
+        """Return the counters and timings of all streams in this run."""
+        return Instrumentation()
+
+    @cached_property
+    def rate_limiters(self) -> Dict[str, RateLimiter]:
+        """Return the rate limiter of every account, which all its requests go through."""
+        return {
+            accountname: RateLimiter(
+                rate=self.config.get("requests_per_second"),
+                burst=self.config.get("rate_limit_burst", 1),
+            )
+            for accountname in self.accounts
+        }
+
+    @cached_property
+    def json_backend(self) -> JSONBackend:
+        """Return the backend that decodes responses and encodes messages."""
+        return get_backend(self.config.get("json_backend", "auto"))
+
+    def serialize_message(self, message: Message) -> str:
+        """Encode a message as a line of JSON with the JSON backend."""
+        return self.json_backend.dumps(message.to_dict()).decode()
+
+    def write_message(self, message: Message) -> None:
+        """Write a message to stdout, one thread at a time."""
+        with self.lock:
+            super().write_message(message)
+
+    def prepare_sync(self) -> None:
+        """Create the objects that the streams share, before any thread uses them.
+
+        Cached properties are not created under a lock, so they are created here
+        before the threads start. The batch writers of the selected nested streams
+        are created too, so a batch encoding that they cannot write stops the tap
+        before any stream is synced.
+        """
+        for name in (
+            "requests_session",
+            "accounts",
+            "rate_limiters",
+            "instrumentation",
+            "json_backend",
+        ):
+            getattr(self, name)
+
+        for stream in self.streams.values():
+            if isinstance(stream, NestedTicketmaticStream) and stream.selected:
+                getattr(stream, "batch_writer")
+
+    def sync_all(self) -> None:
+        """Sync all streams, concurrently when `concurrent_streams` is set."""
+        self.prepare_sync()
+
+        workers = self.config.get("concurrent_streams", 1)
+        if workers <= 1:
+            super().sync_all()
+            self.sweep_deleted_records()
+            self.report_metrics()
+            return
+
+        self._reset_state_progress_markers()
+        self._set_compatible_replication_methods()
+        if self.state:
+            self.write_message(StateMessage(value=self.state))
+
+        streams = []
+        tasks = []
+        for stream in self.streams.values():
+            if not stream.selected and not stream.has_selected_descendents:
+                self.logger.info("Skipping deselected stream '%s'.", stream.name)
+                continue
+
+            # Child streams are synced by their parent stream.
+            if not stream.parent_stream_type:
+                # Create the bookmark up front so the state only changes per stream.
+                get_writeable_state_dict(stream.tap_state, stream.name)
+                streams.append(stream)
+
+                # Accounts and time windows of a stream are synced as separate tasks.
+                for context in stream.partitions or [None]:
+                    tasks.append((stream, context))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(stream.sync, context) for stream, context in tasks
+            ]
+            for future in futures:
+                future.result()
+
+        for stream in streams:
+            stream.finalize_state_progress_markers()
+
+        for stream in self.streams.values():
+            stream.log_sync_costs()
+
+        self.sweep_deleted_records()
+        self.report_metrics()
+
+    def sweep_deleted_records(self) -> None:
+        """Emit markers for the deleted records of the selected paginated streams."""
+        if not self.config.get("track_deleted_records"):
+            return
+
+        contexts = [
+            {"accountname": accountname} if self.config.get("accounts") else None
+            for accountname in self.accounts
+        ]
+        tasks = [
+            (stream, context)
+            for stream in self.streams.values()
+            if stream.selected and isinstance(stream, PaginatedTicketmaticStream)
+            for context in contexts
+        ]
+
+        workers = self.config.get("concurrent_streams", 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(stream.sweep_deleted_records, context)
+                for stream, context in tasks
+            ]
+            for future in futures:
+                future.result()
+
+    def report_metrics(self) -> None:
+        """Log the metrics of every stream and write them to the `metrics_file`."""
+        self.instrumentation.log_summary(self.logger.info)
+
+        if self.config.get("metrics_file"):
+            self.instrumentation.write(
+                Path(self.config["metrics_file"]),
+                openmetrics=self.config.get("metrics_format") == "openmetrics",
+            )
 
     def discover_streams(self) -> List[Stream]:
-        """Return a list of discovered streams."""
-        return [stream_class(tap=self) for stream_class in STREAM_TYPES]
+        """Return a list of discovered streams.
+
+        With a catalog, only the selected streams and their parents are created,
+        so their schemas are the only ones that are built.
+        """
+        stream_types = STREAM_TYPES
+        if self.input_catalog is not None:
+            selected = set()
+            for stream_class in STREAM_TYPES:
+                entry = self.input_catalog.get(stream_class.name)
+                if entry is None or entry.metadata.resolve_selection().get((), True):
+                    selected.add(stream_class)
+                    parent = stream_class.parent_stream_type
+                    while parent:
+                        selected.add(parent)
+                        parent = parent.parent_stream_type
+
+            stream_types = [stream for stream in STREAM_TYPES if stream in selected]
+
+        return [stream_class(tap=self) for stream_class in stream_types]
@@ -0,0 +1,34 @@
+"""Fixtures that serve the local stand-in of the Ticketmatic API."""
+
+import argparse
+import threading
+from typing import Iterator
+
+import pytest
+
+from benchmarks.server import TicketmaticStandIn, add_arguments, create_server
+
+
+@pytest.fixture(scope="session")
+def stand_in() -> Iterator[TicketmaticStandIn]:
+    """Serve 200 orders, events and contacts, with 3 items per array."""
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    server = create_server(
+        0, parser.parse_args(["--pages", "4", "--page-size", "50", "--items", "3"])
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def config(stand_in: TicketmaticStandIn) -> dict:
+    """Return the settings of a tap that syncs the stand-in."""
+    return {
+        "accountname": "test",
+        "api_key": "key",
+        "api_secret": "secret",
+        "api_url": f"http://127.0.0.1:{stand_in.server_port}/api/1",
+        "json_backend": "json",
+    }
@@ -0,0 +1,30 @@
+"""Helpers that run the tap against the local stand-in of the API."""
+
+import contextlib
+import io
+import json
+from typing import Iterable, List
+
+from tap_ticketmatic.tap import Tapticketmatic
+
+
+def select_streams(config: dict, streams: Iterable[str]) -> dict:
+    """Return the discovered catalog with only the given streams selected."""
+    streams = set(streams)
+    catalog = Tapticketmatic(config=config).catalog_dict
+    for entry in catalog["streams"]:
+        for metadata in entry["metadata"]:
+            if not metadata["breadcrumb"]:
+                metadata["metadata"]["selected"] = entry["tap_stream_id"] in streams
+
+    return catalog
+
+
+def run_tap(config: dict, catalog: dict, state: dict = None) -> List[dict]:
+    """Run a sync and return the messages that the tap wrote."""
+    tap = Tapticketmatic(config=config, catalog=catalog, state=state or {})
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        tap.sync_all()
+
+    return [json.loads(line) for line in output.getvalue().splitlines()]
@@ -0,0 +1,75 @@
+"""Tests of the batch mode of the tap."""
+
+import gzip
+import json
+from pathlib import Path
+
+from tap_ticketmatic.cache import KeyIndex
+from tests.helpers import run_tap, select_streams
+
+
+def test_batch_records_without_window_keys(config: dict, tmp_path: Path) -> None:
+    """Records in batch files have no keys of the time window they were synced in."""
+    config = {
+        **config,
+        "window_months": 1,
+        "batch_config": {
+            "encoding": {"format": "jsonl", "compression": "gzip"},
+            "storage": {"root": tmp_path.as_uri(), "prefix": "batch-"},
+            "batch_size": 1000,
+        },
+    }
+    messages = run_tap(config, select_streams(config, ["orders", "contacts"]))
+
+    records = []
+    for message in messages:
+        assert message["type"] != "RECORD"
+        if message["type"] == "BATCH":
+            for url in message["manifest"]:
+                path = Path(url.replace("file://", ""))
+                records.extend(
+                    json.loads(line)
+                    for line in gzip.decompress(path.read_bytes()).splitlines()
+                )
+
+    assert len(records) == 400
+    assert not any(
+        "window_start" in record or "window_end" in record for record in records
+    )
+
+
+def test_batch_deletion_markers(config: dict, tmp_path: Path) -> None:
+    """Deletion markers are written to batch files in batch mode."""
+    config = {
+        **config,
+        "cache_dir": str(tmp_path / "cache"),
+        "track_deleted_records": True,
+        "batch_config": {
+            "encoding": {"format": "jsonl", "compression": "gzip"},
+            "storage": {"root": tmp_path.as_uri(), "prefix": "batch-"},
+            "batch_size": 1000,
+        },
+    }
+    catalog = select_streams(config, ["contacts"])
+    run_tap(config, catalog)
+
+    # A contact that the stand-in does not list, as if it was deleted since.
+    index = KeyIndex(tmp_path / "cache" / "test" / "contacts.ids")
+    index.add(10**9)
+    index.save()
+
+    markers = []
+    for message in run_tap(config, catalog):
+        assert message["type"] != "RECORD"
+        if message["type"] == "BATCH":
+            for url in message["manifest"]:
+                path = Path(url.replace("file://", ""))
+                markers.extend(
+                    record
+                    for record in map(
+                        json.loads, gzip.decompress(path.read_bytes()).splitlines()
+                    )
+                    if "_sdc_deleted_at" in record
+                )
+
+    assert [marker["id"] for marker in markers] == [10**9]
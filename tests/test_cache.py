@@ -0,0 +1,153 @@
+"""Tests of the files that the tap keeps in its cache directory."""
+
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from tap_ticketmatic.cache import FingerprintStore, KeyIndex, RecordCache
+from tap_ticketmatic.tap import Tapticketmatic
+
+
+def test_record_cache_merges_records_updated_since_the_bookmark(
+    tmp_path: Path,
+) -> None:
+    """Records that an incremental response left out stay in the cache."""
+    cache = RecordCache(tmp_path / "price_types.json", ttl=3600)
+    for key in [1, 2, 3]:
+        cache.is_changed(key, {"id": key, "name": "Regular"})
+    cache.save()
+
+    cache = RecordCache(tmp_path / "price_types.json", ttl=3600)
+    assert cache.is_changed(2, {"id": 2, "name": "Reduced"})
+    cache.save(evict=False)
+
+    cache = RecordCache(tmp_path / "price_types.json", ttl=3600)
+    assert sorted(cache.hashes) == ["1", "2", "3"]
+    assert not cache.is_changed(1, {"id": 1, "name": "Regular"})
+    assert not cache.is_changed(2, {"id": 2, "name": "Reduced"})
+
+
+def test_record_cache_evicts_records_after_a_full_response(tmp_path: Path) -> None:
+    """Records that a response with all records left out are evicted."""
+    cache = RecordCache(tmp_path / "price_types.json", ttl=3600)
+    for key in [1, 2, 3]:
+        cache.is_changed(key, {"id": key, "name": "Regular"})
+    cache.save()
+
+    cache = RecordCache(tmp_path / "price_types.json", ttl=3600)
+    cache.is_changed(1, {"id": 1, "name": "Regular"})
+    cache.save()
+
+    assert list(RecordCache(tmp_path / "price_types.json", ttl=3600).hashes) == ["1"]
+
+
+def test_fingerprint_store_finds_stored_keys(tmp_path: Path) -> None:
+    """Fingerprints are found by binary search in the file, missing keys are not."""
+    store = FingerprintStore(tmp_path / "orders.fingerprints")
+    for key in range(1, 200, 2):
+        assert store.is_changed(key, {"id": key})
+    store.save()
+
+    assert all(store.get(key) for key in range(1, 200, 2))
+    assert not any(store.get(key) for key in [-1, 0, 2, 100, 201])
+    assert not any(store.is_changed(key, {"id": key}) for key in range(1, 200, 2))
+
+
+def test_fingerprint_store_merges_fingerprints_on_save(tmp_path: Path) -> None:
+    """Changed and new records replace or extend the stored fingerprints."""
+    store = FingerprintStore(tmp_path / "orders.fingerprints")
+    for key in [1, 2, 3]:
+        store.is_changed(key, {"id": key, "status": "open"})
+    store.save()
+
+    assert store.is_changed(2, {"id": 2, "status": "paid"})
+    assert store.is_changed(4, {"id": 4, "status": "open"})
+    store.save()
+
+    assert [key for key, _ in store._entries()] == [1, 2, 3, 4]
+    assert not store.is_changed(2, {"id": 2, "status": "paid"})
+    assert store.is_changed(2, {"id": 2, "status": "open"})
+
+
+def test_fingerprint_store_is_kept_between_runs(tmp_path: Path) -> None:
+    """A reopened store knows the fingerprints of the previous run."""
+    store = FingerprintStore(tmp_path / "orders.fingerprints")
+    store.is_changed(1, {"id": 1, "status": "open"})
+    store.save()
+
+    store = FingerprintStore(tmp_path / "orders.fingerprints")
+    assert not store.is_changed(1, {"id": 1, "status": "open"})
+    assert store.is_changed(1, {"id": 1, "status": "paid"})
+
+
+def test_key_index_merges_keys_on_save(tmp_path: Path) -> None:
+    """Added keys are merged into the stored keys, in order and without duplicates."""
+    index = KeyIndex(tmp_path / "orders.keys")
+    for key in [5, 1, 3]:
+        index.add(key)
+    index.save()
+
+    index = KeyIndex(tmp_path / "orders.keys")
+    for key in [4, 3, 9]:
+        index.add(key)
+    index.save()
+
+    assert list(KeyIndex(tmp_path / "orders.keys")._keys()) == [1, 3, 4, 5, 9]
+
+
+def test_key_index_sweep_yields_keys_that_are_no_longer_listed(
+    tmp_path: Path,
+) -> None:
+    """A sweep reports the unlisted keys and stores only the listed ones."""
+    index = KeyIndex(tmp_path / "orders.keys")
+    for key in [1, 2, 3, 5, 8]:
+        index.add(key)
+    index.save()
+    index.add(13)
+
+    assert list(index.sweep([2, 5, 6, 13])) == [1, 3, 8]
+    assert list(KeyIndex(tmp_path / "orders.keys")._keys()) == [2, 5, 6, 13]
+
+
+def test_key_index_keeps_its_keys_after_an_interrupted_sweep(
+    tmp_path: Path,
+) -> None:
+    """A sweep that fails while the keys are listed leaves the file as it was."""
+    index = KeyIndex(tmp_path / "orders.keys")
+    for key in [1, 2, 3]:
+        index.add(key)
+    index.save()
+
+    def listed() -> Iterator[int]:
+        yield 2
+        raise ValueError("The ids are not in ascending order")
+
+    with pytest.raises(ValueError):
+        list(index.sweep(listed()))
+
+    assert list(KeyIndex(tmp_path / "orders.keys")._keys()) == [1, 2, 3]
+    assert not (tmp_path / "orders.tmp").exists()
+
+
+@pytest.mark.parametrize(
+    "flag, caches",
+    [
+        ("skip_unchanged_settings", ["settings"]),
+        ("skip_unchanged_records", ["fingerprints"]),
+        ("track_deleted_records", ["keys"]),
+    ],
+)
+def test_caches_are_enabled_by_their_own_flag(
+    config: dict, tmp_path: Path, flag: str, caches: list
+) -> None:
+    """The cache directory only sets where the caches are, not which are used."""
+    config = {**config, "cache_dir": str(tmp_path), flag: True}
+    streams = Tapticketmatic(config=config).streams
+    enabled = {
+        "settings": streams["price_types"].get_record_cache(None),
+        "fingerprints": streams["orders"].get_fingerprints(None),
+        "keys": streams["orders"].get_key_index(None),
+    }
+
+    assert [name for name, cache in enabled.items() if cache] == caches
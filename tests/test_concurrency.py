@@ -0,0 +1,38 @@
+"""Tests of syncs of several accounts and time windows on concurrent threads."""
+
+from tests.helpers import run_tap, select_streams
+
+
+def test_concurrent_partitions_write_valid_state(config: dict) -> None:
+    """Every STATE message is written whole, and every partition keeps its bookmark.
+
+    Each line is parsed by `run_tap`, so a STATE message that was cut off by an
+    error while the state was copied fails the test.
+    """
+    accounts = ["account1", "account2", "account3", "account4"]
+    config = {
+        **config,
+        "accounts": [
+            {"accountname": name, "api_key": "key", "api_secret": "secret"}
+            for name in accounts
+        ],
+        "window_months": 1,
+        "concurrent_streams": 16,
+    }
+    catalog = select_streams(config, ["orders", "contacts"])
+
+    for _ in range(3):
+        messages = run_tap(config, catalog)
+
+        states = [message for message in messages if message["type"] == "STATE"]
+        assert states
+        schemas = [message for message in messages if message["type"] == "SCHEMA"]
+        assert sorted(schema["stream"] for schema in schemas) == ["contacts", "orders"]
+
+        bookmarks = states[-1]["value"]["bookmarks"]
+        for stream in ("orders", "contacts"):
+            partitions = bookmarks[stream]["partitions"]
+            assert {
+                partition["context"]["accountname"] for partition in partitions
+            } == set(accounts)
+            assert len(partitions) % len(accounts) == 0
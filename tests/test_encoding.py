@@ -0,0 +1,51 @@
+"""Tests of the JSON backends."""
+
+import decimal
+from pathlib import Path
+
+import pytest
+
+from tap_ticketmatic import encoding
+from tap_ticketmatic.cache import FingerprintStore, record_hash
+
+
+@pytest.mark.parametrize(
+    "installed, expected",
+    [
+        ({"orjson", "msgspec", "json"}, "msgspec"),
+        ({"orjson", "json"}, "json"),
+        ({"json"}, "json"),
+    ],
+)
+def test_auto_backend_keeps_decimals(
+    monkeypatch: pytest.MonkeyPatch, installed: set, expected: str
+) -> None:
+    """`auto` never picks orjson, which decodes amounts as floats."""
+    if any(encoding.MODULES[name] is None for name in installed):
+        pytest.skip("A backend of this case is not installed.")
+
+    for name, module in list(encoding.MODULES.items()):
+        monkeypatch.setitem(
+            encoding.MODULES, name, module if name in installed else None
+        )
+
+    backend = encoding.get_backend("auto")
+    assert backend.name == expected
+    assert backend.loads(b'{"amount": 1.10}') == {"amount": decimal.Decimal("1.10")}
+
+
+def test_hashes_do_not_depend_on_the_backend(tmp_path: Path) -> None:
+    """Records with equal numbers of another type have the same hash."""
+    as_decimals = {
+        "id": 1,
+        "amount": decimal.Decimal("1.10"),
+        "count": decimal.Decimal("2"),
+    }
+    as_floats = {"id": 1, "amount": 1.1, "count": 2.0}
+
+    assert record_hash(as_decimals) == record_hash(as_floats)
+    assert record_hash(as_decimals) != record_hash({**as_floats, "amount": 1.2})
+
+    store = FingerprintStore(tmp_path / "orders.fingerprints")
+    assert store.is_changed(1, as_decimals)
+    assert not store.is_changed(1, as_floats)
@@ -0,0 +1,130 @@
+"""Tests of the queries/export engine, against the local stand-in of the API."""
+
+import json
+from collections import defaultdict
+from typing import Dict, List
+
+from tap_ticketmatic.client import export_query, merge_nested
+from tap_ticketmatic.streams import Orders
+from tap_ticketmatic.tap import Tapticketmatic
+from tests.helpers import run_tap
+
+STREAMS = ("orders", "order_tickets", "order_payments")
+
+# Property of the orders with the records of each nested stream.
+NESTED = {"order_tickets": "tickets", "order_payments": "payments"}
+
+
+def select(config: dict, exportable: bool) -> dict:
+    """Return a catalog with the orders and their tickets and payments selected.
+
+    With `exportable`, the properties that the export cannot fill are deselected.
+    """
+    catalog = Tapticketmatic(config=config).catalog_dict
+    for entry in catalog["streams"]:
+        for metadata in entry["metadata"]:
+            breadcrumb = metadata["breadcrumb"]
+            if not breadcrumb:
+                metadata["metadata"]["selected"] = entry["tap_stream_id"] in STREAMS
+            elif exportable and entry["tap_stream_id"] == "orders":
+                metadata["metadata"]["selected"] = (
+                    breadcrumb[1] in Orders.export_columns
+                    or breadcrumb[1] in Orders.export_nested
+                )
+            elif exportable and entry["tap_stream_id"] in NESTED:
+                columns = Orders.export_nested[NESTED[entry["tap_stream_id"]]][2]
+                metadata["metadata"]["selected"] = breadcrumb[1] in columns
+
+        if exportable and entry["tap_stream_id"] == "orders":
+            for name, (_, _, columns) in Orders.export_nested.items():
+                items = entry["schema"]["properties"][name]["items"]
+                entry["metadata"].extend(
+                    {
+                        "breadcrumb": ["properties", name, "items", "properties", key],
+                        "metadata": {"selected": key in columns},
+                    }
+                    for key in items["properties"]
+                )
+
+    return catalog
+
+
+def sync(config: dict, catalog: dict) -> Dict[str, List[dict]]:
+    """Run a sync and return the records by stream, in a stable order."""
+    records = defaultdict(list)
+    for message in run_tap(config, catalog):
+        if message["type"] == "RECORD":
+            records[message["stream"]].append(message["record"])
+
+    for stream_records in records.values():
+        stream_records.sort(key=lambda record: json.dumps(record, sort_keys=True))
+
+    return records
+
+
+def test_export_query_formats_timestamps() -> None:
+    """Timestamps are formatted like the REST endpoints return them."""
+    query = export_query(
+        "tm.order",
+        {"orderid": "id", "lastupdatets": "lastupdatets"},
+        Orders.schema,
+        "true",
+        "id",
+    )
+
+    assert query == (
+        "select id as orderid, "
+        "to_char(lastupdatets, 'YYYY-MM-DD HH24:MI:SS') as lastupdatets "
+        "from tm.order where true order by id"
+    )
+
+
+def test_merge_nested() -> None:
+    """Rows are added to their records, and rows without a record are skipped."""
+    records = [{"orderid": 1}, {"orderid": 3}, {"orderid": 4}]
+    tickets = [
+        {"orderid": 1, "id": 10},
+        {"orderid": 1, "id": 11},
+        {"orderid": 2, "id": 20},
+        {"orderid": 4, "id": 40},
+        {"orderid": 5, "id": 50},
+    ]
+
+    merged = list(merge_nested(records, "orderid", {"tickets": ("orderid", tickets)}))
+
+    assert [[ticket["id"] for ticket in record["tickets"]] for record in merged] == [
+        [10, 11],
+        [],
+        [40],
+    ]
+
+
+def test_export_matches_rest(config: dict) -> None:
+    """The export engine returns the same records as paging through the API."""
+    catalog = select(config, exportable=True)
+    export_config = {**config, "export_streams": ["orders"]}
+    orders = Tapticketmatic(config=export_config, catalog=catalog).streams["orders"]
+    paged = sync(config, catalog)
+    exported = sync(export_config, catalog)
+
+    assert orders.export_engine
+
+    assert len(paged["orders"]) == 200
+    assert len(paged["order_tickets"]) == 600
+    assert all("firstname" not in record for record in exported["orders"])
+    for stream in STREAMS:
+        assert exported[stream] == paged[stream]
+
+
+def test_export_falls_back_to_rest(config: dict) -> None:
+    """Streams with properties that the export cannot fill are paged instead."""
+    config = {**config, "export_streams": ["orders"]}
+    catalog = select(config, exportable=False)
+    orders = Tapticketmatic(config=config, catalog=catalog).streams["orders"]
+    exported = sync(config, catalog)
+
+    assert not orders.export_engine
+    assert "firstname" in orders.export_unsupported
+    assert "tickets.eventid" in orders.export_unsupported
+    assert all("firstname" in record for record in exported["orders"])
+    assert all("eventid" in record for record in exported["order_tickets"])
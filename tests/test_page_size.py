@@ -0,0 +1,76 @@
+"""Tests of the adaptive page size."""
+
+from tap_ticketmatic.client import PageSizer
+from tap_ticketmatic.tap import Tapticketmatic
+from tests.helpers import run_tap, select_streams
+
+
+def page_sizer(size: int = 400) -> PageSizer:
+    """Return a page sizer between 100 and 1000 records, 1 second and 1000 bytes."""
+    return PageSizer(
+        size=size, minimum=100, maximum=1000, target_seconds=1, max_bytes=1000
+    )
+
+
+def test_page_size_grows_after_fast_full_pages() -> None:
+    """Full pages that are fast and small double the size, up to the maximum."""
+    sizer = page_sizer()
+    sizer.observe(0.1, 100, 400)
+    assert sizer.size == 800
+
+    sizer.observe(0.1, 100, 800)
+    assert sizer.size == 1000
+
+    # A page that is not full is the last page, and says nothing about the size.
+    sizer = page_sizer()
+    sizer.observe(0.1, 100, 10)
+    assert sizer.size == 400
+
+
+def test_page_size_shrinks_after_slow_or_large_pages() -> None:
+    """Slow, large or failed pages halve the size, down to the minimum."""
+    sizer = page_sizer()
+    sizer.observe(2, 100, 400)
+    assert sizer.size == 200
+
+    sizer.observe(0.1, 2000, 200)
+    assert sizer.size == 100
+
+    sizer.shrink()
+    assert sizer.size == 100
+
+    assert page_sizer(size=5000).size == 1000
+
+
+def test_partitions_have_their_own_page_size(config: dict) -> None:
+    """A slow partition does not shrink the pages of the other partitions."""
+    config = {**config, "adaptive_page_size": True, "min_page_size": 10}
+    orders = Tapticketmatic(config=config).streams["orders"]
+    slow = {"accountname": "test", "window_start": "2021-01-01T00:00:00+00:00"}
+    fast = {"accountname": "test", "window_start": "2021-02-01T00:00:00+00:00"}
+
+    orders.get_page_sizer(slow).shrink()
+
+    assert orders.get_page_sizer({**slow}) is orders.get_page_sizer(slow)
+    assert orders.get_page_size(slow) == orders.limit_per_request // 2
+    assert orders.get_page_size(fast) == orders.limit_per_request
+    assert orders.get_url_params(fast, 0)["limit"] == orders.limit_per_request
+
+
+def test_adaptive_page_size_with_windows(config: dict) -> None:
+    """Concurrent windows with adaptive page sizes emit every record once."""
+    config = {
+        **config,
+        "adaptive_page_size": True,
+        "min_page_size": 10,
+        "window_months": 1,
+        "concurrent_streams": 4,
+    }
+    messages = run_tap(config, select_streams(config, ["orders"]))
+
+    ids = [
+        message["record"]["orderid"]
+        for message in messages
+        if message["type"] == "RECORD"
+    ]
+    assert len(ids) == len(set(ids)) == 200
@@ -0,0 +1,30 @@
+"""Tests of the pages that are fetched ahead of the page being emitted."""
+
+import pytest
+
+from tests.helpers import run_tap, select_streams
+
+
+def sync_contacts(config: dict) -> list:
+    """Return the records of the contacts stream."""
+    return [
+        message["record"]
+        for message in run_tap(config, select_streams(config, ["contacts"]))
+        if message["type"] == "RECORD"
+    ]
+
+
+@pytest.mark.parametrize("stream_records", [False, True])
+def test_prefetched_pages_emit_every_record_in_order(
+    config: dict, stream_records: bool
+) -> None:
+    """Prefetched pages, also streamed ones, emit their records in page order."""
+    if stream_records:
+        pytest.importorskip("ijson")
+
+    prefetched = sync_contacts(
+        {**config, "concurrent_pages": 3, "stream_records": stream_records}
+    )
+
+    assert len(prefetched) == 200
+    assert prefetched == sync_contacts(config)
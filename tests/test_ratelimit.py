@@ -0,0 +1,85 @@
+"""Tests of the rate limiter that the streams share."""
+
+import email.utils
+import threading
+import time
+from typing import List
+
+from requests import Response
+
+from tap_ticketmatic.ratelimit import RateLimiter, retry_after_seconds
+
+
+def response_with(headers: dict) -> Response:
+    """Return a response with the given headers."""
+    response = Response()
+    response.headers.update(headers)
+    return response
+
+
+def test_refill_adds_tokens_up_to_the_burst() -> None:
+    """Tokens are earned at the rate and never exceed the burst."""
+    limiter = RateLimiter(rate=10, burst=2)
+    limiter.tokens = 0.0
+    limiter.updated = 100.0
+
+    limiter.refill(100.1)
+    assert abs(limiter.tokens - 1.0) < 1e-9
+
+    limiter.refill(200.0)
+    assert limiter.tokens == 2
+
+
+def test_requests_wait_for_tokens_after_the_burst() -> None:
+    """The burst is sent at once, later requests are spaced by the rate."""
+    limiter = RateLimiter(rate=20, burst=2)
+    started = time.monotonic()
+    for _ in range(4):
+        limiter.acquire("orders")
+
+    assert time.monotonic() - started >= 0.09
+
+
+def test_waiting_streams_take_turns() -> None:
+    """A stream with many waiting requests cannot starve another stream."""
+    limiter = RateLimiter(rate=20, burst=1)
+    limiter.pause(0.3)
+    order: List[str] = []
+
+    def request(key: str) -> None:
+        limiter.acquire(key)
+        order.append(key)
+
+    threads = []
+    for key in ["orders", "orders", "orders", "contacts"]:
+        thread = threading.Thread(target=request, args=(key,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+
+    assert order == ["orders", "contacts", "orders", "orders"]
+
+
+def test_pause_holds_all_requests() -> None:
+    """Requests wait until the pause after a `Retry-After` is over."""
+    limiter = RateLimiter()
+    limiter.pause(0.2)
+    started = time.monotonic()
+    limiter.acquire("orders")
+
+    assert time.monotonic() - started >= 0.15
+
+
+def test_retry_after_seconds() -> None:
+    """`Retry-After` is read as a number of seconds or as a date."""
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds(response_with({})) is None
+    assert retry_after_seconds(response_with({"Retry-After": "soon"})) is None
+    assert retry_after_seconds(response_with({"Retry-After": "5"})) == 5
+    assert retry_after_seconds(response_with({"Retry-After": "-1"})) == 0
+
+    retry_at = email.utils.formatdate(time.time() + 30, usegmt=True)
+    seconds = retry_after_seconds(response_with({"Retry-After": retry_at}))
+    assert 25 <= seconds <= 30
@@ -0,0 +1,36 @@
+"""Tests of the selection of properties in the catalog."""
+
+from tests.helpers import run_tap, select_streams
+
+
+def test_nested_stream_keeps_properties_deselected_in_parent(config: dict) -> None:
+    """A nested stream gets the properties that only its parent deselects."""
+    catalog = select_streams(config, ["orders", "order_tickets"])
+    for entry in catalog["streams"]:
+        if entry["tap_stream_id"] == "orders":
+            entry["metadata"].append(
+                {
+                    "breadcrumb": [
+                        "properties",
+                        "tickets",
+                        "items",
+                        "properties",
+                        "eventid",
+                    ],
+                    "metadata": {"selected": False},
+                }
+            )
+
+    records = {"orders": [], "order_tickets": []}
+    for message in run_tap(config, catalog):
+        if message["type"] == "RECORD":
+            records[message["stream"]].append(message["record"])
+
+    assert len(records["orders"]) == 200
+    assert len(records["order_tickets"]) == 600
+    assert all("eventid" in ticket for ticket in records["order_tickets"])
+    assert all(
+        "eventid" not in ticket
+        for order in records["orders"]
+        for ticket in order["tickets"]
+    )
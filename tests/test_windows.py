@@ -0,0 +1,69 @@
+"""Tests of the time windows of the incremental streams."""
+
+import datetime
+
+from tap_ticketmatic.client import month_windows
+from tests.helpers import run_tap, select_streams
+
+UTC = datetime.timezone.utc
+
+
+def starts_and_ends(windows: list) -> list:
+    """Return the dates of the start and end of every window."""
+    return [
+        (window["window_start"][:10], window["window_end"][:10]) for window in windows
+    ]
+
+
+def test_month_windows_roll_over_months_and_years() -> None:
+    """Windows start on the first of the month and continue in the next year."""
+    windows = month_windows(
+        datetime.datetime(2022, 10, 15, 8, 30, tzinfo=UTC),
+        datetime.datetime(2023, 2, 1, tzinfo=UTC),
+        1,
+    )
+
+    assert starts_and_ends(windows) == [
+        ("2022-10-01", "2022-11-01"),
+        ("2022-11-01", "2022-12-01"),
+        ("2022-12-01", "2023-01-01"),
+        ("2023-01-01", "2023-02-01"),
+        ("2023-02-01", "2023-03-01"),
+    ]
+    assert windows[0]["window_start"] == "2022-10-01T00:00:00+00:00"
+
+
+def test_month_windows_end_with_a_partial_window() -> None:
+    """The last window covers the end of the range, even when it ends later."""
+    windows = month_windows(
+        datetime.datetime(2022, 11, 1, tzinfo=UTC),
+        datetime.datetime(2023, 5, 20, tzinfo=UTC),
+        3,
+    )
+
+    assert starts_and_ends(windows) == [
+        ("2022-11-01", "2023-02-01"),
+        ("2023-02-01", "2023-05-01"),
+        ("2023-05-01", "2023-08-01"),
+    ]
+
+
+def test_windows_before_the_bookmark_are_skipped(config: dict) -> None:
+    """Switching to windows continues at the bookmark instead of a backfill."""
+    catalog = select_streams(config, ["orders"])
+    messages = run_tap(config, catalog)
+    state = [message for message in messages if message["type"] == "STATE"][-1]
+
+    config = {**config, "window_months": 1}
+    messages = run_tap(config, catalog, state=state["value"])
+
+    bookmark = state["value"]["bookmarks"]["orders"]["replication_key_value"]
+    records = [message for message in messages if message["type"] == "RECORD"]
+    assert records
+    assert all(record["record"]["lastupdatets"] >= bookmark for record in records)
+
+    state = [message for message in messages if message["type"] == "STATE"][-1]
+    partitions = state["value"]["bookmarks"]["orders"]["partitions"]
+    assert all(
+        partition["context"]["window_end"] > "2023-01-01" for partition in partitions
+    )